@@ -1,7 +1,8 @@
-import time
 import curses
 import curses.textpad
 import curses.ascii
+import queue
+import threading
 from typing import Tuple, List
 from tcpsockets import client, logger
 import textwrap
@@ -10,7 +11,8 @@ log_file = open("Log.txt", "a")
 logger.set_log_files([log_file])
 
 chats: List[str] = []
-send_this: List[str] = []
+send_this: "queue.Queue[List[str]]" = queue.Queue()
+cursor = 0
 running = True
 
 
@@ -80,7 +82,7 @@ def chat_page(screen: curses.window):
             if key:
                 if key == curses.KEY_ENTER or key in (10, 13):
                     if read_str:
-                        send_this.append(read_str)
+                        send_this.put([read_str])
                         read_str = ""
                 elif key == curses.KEY_BACKSPACE or key == 8:
                     if read_str:
@@ -103,19 +105,30 @@ def chat_page(screen: curses.window):
 chat_srvr = client.ConnectedServer("192.168.1.3", 1234)
 
 
+def receive_chats():
+    global cursor
+    global running
+    try:
+        while running:
+            for seq, chat in chat_srvr.receive():
+                chats.append(chat)
+                cursor = seq
+    except (ConnectionError, OSError):
+        running = False
+
+
 @chat_srvr.on_connection
 def on_connection():
-    global chats
     global running
     try:
+        chat_srvr.send(("SUBSCRIBE", cursor))
+        threading.Thread(target=receive_chats, daemon=True).start()
         while running:
-            if send_this:
-                chat_srvr.send("POST")
-                chat_srvr.send(send_this)
-                send_this.clear()
-            chat_srvr.send("GET")
-            chats = chat_srvr.receive()
-        chat_srvr.send("QUIT")
+            try:
+                chat_srvr.send(("POST", send_this.get(timeout=0.5)))
+            except queue.Empty:
+                pass
+        chat_srvr.send(("QUIT",))
     except ConnectionResetError:
         running = False
         print("Server disconnected")
@@ -0,0 +1,74 @@
+"""
+Load test for chatServer.py. Starts a chat server on loopback, connects hundreds of simulated chat clients that
+subscribe to the chat and post messages, then reports how long it took for every client to receive every message.
+
+    python chatLoadTest.py --clients 300 --messages 5
+"""
+import argparse
+import threading
+import time
+from typing import List
+from tcpsockets import client, server, logger
+from chatServer import ChatServer
+
+
+class SimulatedChatClient:
+    def __init__(self, port: int, expected: int):
+        self.expected = expected
+        self.received = 0
+        self.latencies: List[float] = []
+        self.done = threading.Event()
+        self.conn = client.ConnectedServer("127.0.0.1", port, background=True)
+        self.conn.on_connection(self.receive_chats)
+
+    def receive_chats(self) -> None:
+        self.conn.send(("SUBSCRIBE", 0))
+        while self.received < self.expected:
+            for seq, chat in self.conn.receive():
+                self.latencies.append(time.perf_counter() - float(chat.split()[-1]))
+                self.received += 1
+        self.conn.send(("QUIT",))
+        self.done.set()
+
+    def post(self, text: str) -> None:
+        self.conn.send(("POST", [f"{text} {time.perf_counter()}"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=300, help="Number of simulated chat clients.")
+    parser.add_argument("--messages", type=int, default=5, help="Messages posted by every client.")
+    args = parser.parse_args()
+
+    logger.set_logging(False)
+    chat_server = ChatServer(server.ParallelServer("127.0.0.1", 0, queue=args.clients),
+                             max_messages=args.clients * args.messages)
+    chat_server.start()
+    expected = args.clients * args.messages
+    chat_clients = [SimulatedChatClient(chat_server.srvr.port, expected) for _ in range(args.clients)]
+    for chat_client in chat_clients:
+        chat_client.conn.connect()
+    while len(chat_server.subscribers) < args.clients:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    for number in range(args.messages):
+        for index, chat_client in enumerate(chat_clients):
+            chat_client.post(f"client {index} message {number}")
+    for chat_client in chat_clients:
+        chat_client.done.wait()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for chat_client in chat_clients for latency in chat_client.latencies)
+    print(f"{args.clients} clients, {expected} messages posted, {len(latencies)} deliveries in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} deliveries/s)")
+    for percentile in (50, 90, 99, 100):
+        index = min(len(latencies) - 1, len(latencies) * percentile // 100)
+        print(f"p{percentile} delivery latency: {latencies[index] * 1000:.1f}ms")
+    for chat_client in chat_clients:
+        chat_client.conn.connection_thread.join()
+    chat_server.srvr.stop_running()
+
+
+if __name__ == "__main__":
+    main()
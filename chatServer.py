@@ -1,31 +1,128 @@
 from tcpsockets import server, logger
-from typing import List
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Tuple
 import pickle
+import threading
 
-srvr = server.ParallelServer()
-chat_buffer: List[str] = []
-
-
-@srvr.client_handler
-def handler(clnt: server.Client):
-    global chat_buffer
-    while srvr.running:
-        req = clnt.receive(byte_converter=pickle.loads)
-        if req == "GET":
-            clnt.send(chat_buffer, pickle.dumps)
-        elif req == "POST":
-            chat_buffer.extend(clnt.receive())
-        elif req == "QUIT":
-            clnt.close()
-            return
-        else:
-            logger.log(f"Client {clnt.client_connection_id} sent illegal request '{req}'.")
-            clnt.close()
-            return
-
-
-srvr.start()
-
-while input() != "q":
-    pass
-srvr.stop_running()
+Message = Tuple[int, str]
+
+
+class ChatLog:
+    """
+    A bounded log of chat messages. Every message gets the next sequence number, so clients only need to remember the
+    last sequence number they have seen (their cursor) to ask for what they missed. Only the last max_messages messages
+    are kept.
+    """
+
+    def __init__(self, max_messages: int = 1000):
+        self.messages: Deque[Message] = deque(maxlen=max_messages)
+        self.last_seq: int = 0
+        self.changed = threading.Condition()
+
+    def extend(self, messages: List[str]) -> None:
+        with self.changed:
+            for message in messages:
+                self.last_seq += 1
+                self.messages.append((self.last_seq, message))
+            self.changed.notify_all()
+
+    def since(self, cursor: int, until: int = None) -> List[Message]:
+        """Messages with cursor < sequence number <= until that are still in the log."""
+        with self.changed:
+            if until is None:
+                until = self.last_seq
+            if not self.messages or cursor >= until:
+                return []
+            first_seq = self.messages[0][0]
+            return list(islice(self.messages, max(0, cursor + 1 - first_seq), max(0, until + 1 - first_seq)))
+
+
+class ChatServer:
+    """
+    Chat server pushing new messages to subscribed clients. A single broadcaster thread pickles every batch of new
+    messages once and sends the same bytes to every subscriber.
+
+    Requests are tuples whose first item is the request name:
+        ("GET", cursor): Reply with the messages after cursor.
+        ("SUBSCRIBE", cursor): Send the messages after cursor, then push new messages as they are posted.
+        ("POST", messages): Add a list of messages.
+        ("QUIT",): Disconnect.
+    Pushed and replied messages are lists of (sequence number, message) tuples.
+    """
+
+    def __init__(self, srvr: server.ParallelServer, max_messages: int = 1000):
+        self.srvr = srvr
+        self.log = ChatLog(max_messages)
+        self.subscribers: List[server.Client] = []
+        self.send_locks = {}
+        self.subscribers_lock = threading.Lock()
+        self.broadcast_seq: int = 0
+        self.broadcaster = threading.Thread(target=self.broadcast, daemon=True)
+        srvr.client_handler(self.handler)
+
+    def start(self) -> None:
+        self.broadcaster.start()
+        self.srvr.start()
+
+    def send(self, clnt: server.Client, payload: bytes) -> bool:
+        try:
+            with self.send_locks[clnt.client_connection_id]:
+                clnt.send(payload, lambda already_pickled: already_pickled)
+        except OSError:
+            return False
+        return True
+
+    def subscribe(self, clnt: server.Client, cursor: int) -> None:
+        with self.subscribers_lock:
+            self.send(clnt, pickle.dumps(self.log.since(cursor, self.broadcast_seq)))
+            self.subscribers.append(clnt)
+
+    def unsubscribe(self, clnt: server.Client) -> None:
+        with self.subscribers_lock:
+            if clnt in self.subscribers:
+                self.subscribers.remove(clnt)
+
+    def broadcast(self) -> None:
+        while True:
+            with self.log.changed:
+                self.log.changed.wait_for(lambda: self.log.last_seq > self.broadcast_seq)
+            with self.subscribers_lock:
+                new_messages = self.log.since(self.broadcast_seq)
+                if not new_messages:
+                    continue
+                self.broadcast_seq = new_messages[-1][0]
+                payload = pickle.dumps(new_messages)
+                self.subscribers = [clnt for clnt in self.subscribers if self.send(clnt, payload)]
+
+    def handler(self, clnt: server.Client) -> None:
+        self.send_locks[clnt.client_connection_id] = threading.Lock()
+        try:
+            while self.srvr.running:
+                req = clnt.receive()
+                if not isinstance(req, tuple) or not req:
+                    logger.log(f"Client {clnt.client_connection_id} sent illegal request '{req}'.")
+                    return
+                if req[0] == "GET":
+                    self.send(clnt, pickle.dumps(self.log.since(req[1])))
+                elif req[0] == "SUBSCRIBE":
+                    self.subscribe(clnt, req[1])
+                elif req[0] == "POST":
+                    self.log.extend(req[1])
+                elif req[0] == "QUIT":
+                    return
+                else:
+                    logger.log(f"Client {clnt.client_connection_id} sent illegal request '{req}'.")
+                    return
+        finally:
+            self.unsubscribe(clnt)
+            del self.send_locks[clnt.client_connection_id]
+
+
+if __name__ == "__main__":
+    chat_server = ChatServer(server.ParallelServer())
+    chat_server.start()
+
+    while input() != "q":
+        pass
+    chat_server.srvr.stop_running()
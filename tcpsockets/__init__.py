@@ -1,4 +1,18 @@
-from . import logger
-from . import server
-from . import settings
-from . import client
+"""
+tcpsockets
+    A package to easily create TCP servers and clients. Submodules are imported the first time they are accessed, so
+    importing the package itself is cheap.
+"""
+import importlib
+
+_submodules = ("batching", "client", "logger", "server", "settings", "shm", "spill", "streaming", "tls", "transport")
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_submodules))
@@ -0,0 +1,182 @@
+"""
+batching.py
+    Provides functions to send and receive many small messages at once. send_many packs the frames of many objects, in
+    the same format as Client.send/ConnectedServer.send, into one buffer sent with one write. receive_many reads as
+    much as is available at once through a BufferedSocket and drains it into as many complete messages as it holds,
+    keeping the leftover bytes for the next call.
+"""
+import socket
+import time
+from .settings import default_header_size
+from typing import Any, Callable, Iterable, List, Union
+
+flush_size: int = 1024 * 1024
+read_size: int = 256 * 1024
+
+
+class BufferedSocket:
+    """
+    A socket like object reading from the wrapped socket in large blocks and keeping the bytes that have not been
+    consumed yet. recv and recv_into return buffered bytes first, so the other receiving methods keep working after
+    receive_many. Every other socket attribute is forwarded to the wrapped socket.
+
+    Args:
+        sckt(socket.socket): The connected socket.
+    Attributes:
+        socket(socket.socket): The connected socket.
+        buffer(bytearray): The bytes read from the socket. Unconsumed bytes are at buffer[start:end].
+    """
+
+    def __init__(self, sckt: socket.socket):
+        self.socket: socket.socket = sckt
+        self.buffer: bytearray = bytearray()
+        self.start: int = 0
+        self.end: int = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.socket, name)
+
+    @property
+    def buffered(self) -> int:
+        """The number of bytes read from the socket but not consumed yet."""
+        return self.end - self.start
+
+    def fill(self, nbytes: int) -> int:
+        """
+        Read up to nbytes more bytes from the socket into the buffer with one recv_into.
+        Args:
+            nbytes(int): The largest number of bytes to read.
+
+        Returns:
+            int: The number of bytes read, 0 if the peer closed the connection.
+        """
+        if self.start:
+            del self.buffer[:self.start]
+            self.end -= self.start
+            self.start = 0
+        if len(self.buffer) < self.end + nbytes:
+            self.buffer += bytes(self.end + nbytes - len(self.buffer))
+        with memoryview(self.buffer) as view:
+            received = self.socket.recv_into(view[self.end:], nbytes)
+        self.end += received
+        return received
+
+    def recv_into(self, buffer: Any, nbytes: int = 0, flags: int = 0) -> int:
+        if not self.buffered:
+            return self.socket.recv_into(buffer, nbytes, flags)
+        with memoryview(buffer) as view:
+            size = min(nbytes or len(view), self.buffered)
+            view[:size] = self.buffer[self.start:self.start + size]
+        self.start += size
+        return size
+
+    def recv(self, bufsize: int, flags: int = 0) -> bytes:
+        if not self.buffered:
+            return self.socket.recv(bufsize, flags)
+        size = min(bufsize, self.buffered)
+        data = bytes(self.buffer[self.start:self.start + size])
+        self.start += size
+        return data
+
+
+def send_many(sckt: socket.socket, objs: Iterable[Any], byte_converter: Callable[[Any], bytes] = None) -> int:
+    """
+    Send many objects, each as its own message that can be received with receive or receive_many. The frames are
+    packed into one buffer and sent with one write, every flush_size bytes for very large batches.
+    Args:
+        sckt(socket.socket): The connected socket.
+        objs(Iterable[Any]): The objects to be sent.
+        byte_converter(Callable[[Any], bytes]): Function to convert one object to bytes. Defaults to pickle.dumps.
+
+    Returns:
+        int: The number of objects sent.
+    """
+    if byte_converter is None:
+        import pickle
+        byte_converter = pickle.dumps
+    header_size = default_header_size
+    buffer = bytearray()
+    count = 0
+    for obj in objs:
+        bytes_obj = byte_converter(obj)
+        buffer += b"%-*d" % (header_size, len(bytes_obj))
+        buffer += bytes_obj
+        count += 1
+        if len(buffer) >= flush_size:
+            sckt.sendall(buffer)
+            buffer.clear()
+    if buffer:
+        sckt.sendall(buffer)
+    return count
+
+
+def drain(sckt: BufferedSocket, max_n: int, byte_converter: Callable[[bytes], Any] = None) -> List[Any]:
+    """
+    Convert the complete messages already buffered, without reading from the socket.
+    Args:
+        sckt(BufferedSocket): The buffered socket.
+        max_n(int): The largest number of messages to convert.
+        byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object. Defaults to pickle.loads.
+
+    Returns:
+        List[Any]: The objects, in the order they were sent.
+    """
+    header_size = default_header_size
+    messages = []
+    start, end = sckt.start, sckt.end
+    with memoryview(sckt.buffer) as view:
+        while len(messages) < max_n and end - start >= header_size:
+            size = int(view[start:start + header_size].tobytes())
+            if end - start - header_size < size:
+                break
+            payload = view[start + header_size:start + header_size + size]
+            if byte_converter is None:
+                import pickle
+                messages.append(pickle.loads(payload))
+            else:
+                messages.append(byte_converter(payload.tobytes()))
+            start += header_size + size
+    sckt.start = start
+    return messages
+
+
+def receive_many(sckt: BufferedSocket, max_n: int, timeout: Union[None, float] = None,
+                 byte_converter: Callable[[bytes], Any] = None) -> List[Any]:
+    """
+    Receive up to max_n messages. Returns the complete messages already buffered if there are any, else blocks until
+    at least one has arrived, reading as much as is available at once.
+    Args:
+        sckt(BufferedSocket): The buffered socket.
+        max_n(int): The largest number of messages to return.
+        timeout(Union[None, float]): Seconds to wait for the first message. Defaults to None (wait forever).
+        byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object. Defaults to pickle.loads.
+
+    Returns:
+        List[Any]: The objects in the order they were sent. Empty if the timeout passed before a complete message
+                   arrived; the partial message stays buffered.
+    """
+    messages = drain(sckt, max_n, byte_converter)
+    if messages:
+        return messages
+    previous_timeout = sckt.gettimeout()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    header_size = default_header_size
+    try:
+        while not messages:
+            missing = read_size
+            if sckt.buffered >= header_size:
+                size = int(sckt.buffer[sckt.start:sckt.start + header_size])
+                missing = max(read_size, header_size + size - sckt.buffered)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                sckt.settimeout(remaining)
+            if not sckt.fill(missing):
+                raise ConnectionError("Connection closed while receiving messages")
+            messages = drain(sckt, max_n, byte_converter)
+    except socket.timeout:
+        return []
+    finally:
+        sckt.settimeout(previous_timeout)
+    return messages
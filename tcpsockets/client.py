@@ -5,10 +5,14 @@ client.py
 import socket
 from .settings import default_header_size, default_chunk_size
 from . import logger
+from .transport import Transport, tcp_transport, send_frame, receive_exactly
 import threading
-import pickle
-from pathlib import Path
-from typing import Any, Callable, Generator, Tuple, Union
+from typing import Any, Callable, Generator, Iterable, List, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import ssl
+    from pathlib import Path
+    from . import spill
 
 TimeoutException = socket.timeout
 
@@ -17,25 +21,55 @@ class ConnectedServer:
     """
     Class to handle connection with servers, send and receive python objects.
     Args:
-        ip(str): The ip address (IPV4) of the server.
+        ip(str): The ip address (IPV4 or IPV6) of the server.
         port(int): The port the server is hosted on.
         background(bool): Whether the server runs in a separate thread or not.
+        ssl_context(ssl.SSLContext): Client side TLS context used to wrap the connection. Defaults to None (plain TCP).
+                                     See tcpsockets.tls.create_client_context.
+        server_hostname(str): The hostname the server certificate is checked against. Defaults to ip.
+        transport(Transport): The transport to connect over, see tcpsockets.transport. Overrides ip and port.
+        shared_memory(bool): Whether to offer shared memory ring buffers to the server after connecting, see
+                             tcpsockets.shm. The server must be created with shared_memory set to True as well. If the
+                             server is on another host the connection stays on the socket. Defaults to False.
+        spill_threshold(int): Messages larger than this many bytes are received into memory mapped temporary files
+                              instead of memory, see tcpsockets.spill. Defaults to None (never spill).
     Attributes:
         background(bool): Whether the server runs in a separate thread or not.
         connection_thread(Union[None,threading.Thread]): The thread in which the connection is made and server
                                                          communication is done if background is set to True. Initially
                                                          set to None,the thread object is made when the start method
                                                          is called.
+        ssl_context(Union[None, ssl.SSLContext]): The TLS context used to wrap the connection.
+        tls_session(Union[None, ssl.SSLSession]): The TLS session of the last closed connection. It is offered to the
+                                                  server on the next connect so that reconnects skip the full handshake.
+        transport(Transport): The transport the connection is made over.
+        shared_memory(bool): Whether shared memory ring buffers are offered to the server.
+        spill_threshold(Union[None, int]): The size above which received messages are spilled to disk.
+        memory_budget(Union[None, spill.MemoryBudget]): A budget received messages are held under, which can be shared
+                                                        between connections. Defaults to None.
     """
 
-    def __init__(self, ip: str, port: int, background: bool = True):
+    def __init__(self, ip: str = None, port: int = None, background: bool = True, ssl_context: "ssl.SSLContext" = None,
+                 server_hostname: str = None, transport: Transport = None, shared_memory: bool = False,
+                 spill_threshold: int = None):
         self.background: bool = background
         if self.background:
             self.connection_thread: Union[None, threading.Thread] = None
-        self.ip: str = ip
-        self.port: int = port
+        if transport is None:
+            if ip is None or port is None:
+                raise Exception("Either ip and port or transport must be set.")
+            transport = tcp_transport(ip, port)
+        self.transport: Transport = transport
+        self.ip: str = transport.ip
+        self.port: Union[None, int] = transport.port
+        self.ssl_context: Union[None, "ssl.SSLContext"] = ssl_context
+        self.server_hostname: str = self.ip if server_hostname is None else server_hostname
+        self.tls_session: Union[None, "ssl.SSLSession"] = None
+        self.shared_memory: bool = shared_memory
+        self.spill_threshold: Union[None, int] = spill_threshold
+        self.memory_budget: Union[None, "spill.MemoryBudget"] = None
         logger.log("Creating server socket")
-        self.socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket: socket.socket = self.transport.create_socket()
 
     def on_connection(self, func: Callable) -> None:
         """
@@ -69,21 +103,37 @@ class ConnectedServer:
 
     def close(self) -> None:
         """
-        Method used to close the connection
+        Method used to close the connection. The TLS session is kept in tls_session for resumption on reconnect.
         Returns:
             None
         """
+        if getattr(self.socket, "session", None) is not None:
+            self.tls_session = self.socket.session
         self.socket.close()
         logger.close_log_files()
 
     def connect(self) -> None:
         """
-        Method to start connection with server.
+        Method to start connection with server. Can be called again after close to reconnect, in which case a TLS
+        connection tries to resume the previous session.
         Returns:
             None
         """
-        logger.log(f"Connecting to {self.ip} at {self.port}")
-        self.socket.connect((self.ip, self.port))
+        if self.socket.fileno() == -1:
+            logger.log("Creating server socket")
+            self.socket = self.transport.create_socket()
+        logger.log(f"Connecting to {self.transport}")
+        self.transport.connect(self.socket)
+        if self.ssl_context is not None:
+            self.socket = self.ssl_context.wrap_socket(self.socket, server_hostname=self.server_hostname,
+                                                       session=self.tls_session)
+            logger.log(f"TLS handshake done with {self.socket.version()}, session reused: "
+                       f"{self.socket.session_reused}")
+        if self.shared_memory:
+            from . import shm
+            shm.offer(self)
+            if isinstance(self.socket, shm.SharedMemorySocket):
+                logger.log("Using shared memory")
         logger.log(f"Connection Successful")
         self.connection_thread = threading.Thread(target=self.main_connection)
         if self.background:
@@ -106,33 +156,39 @@ class ConnectedServer:
 
         """
         if byte_converter is None:
+            import pickle
             bytes_obj = pickle.dumps(obj)
         else:
             bytes_obj = byte_converter(obj)
         bytes_obj_size = len(bytes_obj)
         header = str(bytes_obj_size).ljust(default_header_size).encode("utf-8")
-        self.socket.send(header)
-        self.socket.send(bytes_obj)
+        send_frame(self.socket, header, bytes_obj)
 
     def receive(self, chunk_size: int = None, byte_converter: Callable[[bytes], Any] = None) -> Any:
         """
         Receive a python object sent by the server. First receive a fixed length header then receive the pickled object
-        chunk by chunk using the chunk_size argument.
+        chunk by chunk using the chunk_size argument. Messages larger than spill_threshold, or not fitting in the
+        memory_budget, are received into a memory mapped temporary file, see tcpsockets.spill.
         Args:
             chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
-            byte_converter(Callable[[bytes], Any]): Function to convert bytes to object.
+            byte_converter(Callable[[bytes], Any]): Function to convert bytes to object. Given an mmap.mmap instead of
+                                                    bytes if the message was spilled.
         Returns:
             Any: The object sent by the server
         """
         if chunk_size is None:
             chunk_size = default_chunk_size
-        obj_size_header: str = self.socket.recv(default_header_size).decode("utf-8")
+        obj_size_header: str = receive_exactly(self.socket, default_header_size, default_header_size).decode("utf-8")
         obj_size: int = int(obj_size_header.strip())
-        bytes_obj = b""
-        for _ in range(obj_size // chunk_size):
-            bytes_obj += self.socket.recv(chunk_size)
-        bytes_obj += self.socket.recv(obj_size % chunk_size)
-        return pickle.loads(bytes_obj) if byte_converter is None else byte_converter(bytes_obj)
+        if self.spill_threshold is not None or self.memory_budget is not None:
+            from . import spill
+            return spill.receive(self.socket, obj_size, chunk_size, byte_converter, self.spill_threshold,
+                                 self.memory_budget)
+        bytes_obj = receive_exactly(self.socket, obj_size, chunk_size)
+        if byte_converter is None:
+            import pickle
+            return pickle.loads(bytes_obj)
+        return byte_converter(bytes(bytes_obj))
 
     def set_receive_timeout(self, timeout: int) -> None:
         """
@@ -142,7 +198,7 @@ class ConnectedServer:
         """
         self.socket.settimeout(timeout)
 
-    def send_file(self, file_location: Path, chunk_size: int) -> Generator[Tuple[int, int], None, None]:
+    def send_file(self, file_location: "Path", chunk_size: int) -> Generator[Tuple[int, int], None, None]:
         """
         Send a file object in small chunks whose sizes are "chunk_size" each.
         Args:
@@ -156,16 +212,16 @@ class ConnectedServer:
         sent_size = 0
         with open(file_location, "rb") as file:
             file_chunk = file.read(chunk_size)
-            self.socket.send(file_chunk)
+            self.socket.sendall(file_chunk)
             sent_size += len(file_chunk)
             yield sent_size, file_size
             while file_chunk:
                 file_chunk = file.read(chunk_size)
-                self.socket.send(file_chunk)
+                self.socket.sendall(file_chunk)
                 sent_size += len(file_chunk)
                 yield sent_size, file_size
 
-    def receive_file(self, file_save_location: Path, chunk_size: int) -> Generator[Tuple[int, int], None, None]:
+    def receive_file(self, file_save_location: "Path", chunk_size: int) -> Generator[Tuple[int, int], None, None]:
         """
         Receive a file object in small chunks whose sizes are "chunk_size" each.
         Args:
@@ -182,3 +238,87 @@ class ConnectedServer:
                 byte_number += len(byte_chunk)
                 file.write(byte_chunk)
                 yield byte_number, size
+
+    def send_stream(self, chunks: Iterable[bytes]) -> int:
+        """
+        Send a stream of byte chunks to the server, one frame per chunk followed by an end marker, without having to
+        know its total size or hold it in memory. See tcpsockets.streaming.
+        Args:
+            chunks(Iterable[bytes]): The chunks to be sent. Can be a generator producing them lazily.
+
+        Returns:
+            int: The number of bytes sent.
+        """
+        from . import streaming
+        return streaming.send_stream(self.socket, chunks)
+
+    def receive_stream(self, chunk_size: int = None) -> Generator[bytes, None, None]:
+        """
+        Receive a stream sent with send_stream. The chunks are yielded as soon as they arrive, while the rest of the
+        stream is still being sent. The generator must be exhausted before receiving anything else.
+        Args:
+            chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
+        Returns:
+            Generator[bytes, None, None]: The chunks in the order they were sent.
+        """
+        from . import streaming
+        return streaming.receive_stream(self.socket, chunk_size)
+
+    def send_records(self, records: Iterable[Any], byte_converter: Callable[[Any], bytes] = None) -> int:
+        """
+        Send a stream of python objects to the server, pickling one object at a time.
+        Args:
+            records(Iterable[Any]): The objects to be sent. Can be a generator producing them lazily.
+            byte_converter(Callable[[Any], bytes]): Function to convert one object to bytes.
+
+        Returns:
+            int: The number of objects sent.
+        """
+        from . import streaming
+        return streaming.send_records(self.socket, records, byte_converter)
+
+    def receive_records(self, chunk_size: int = None,
+                        byte_converter: Callable[[bytes], Any] = None) -> Generator[Any, None, None]:
+        """
+        Receive a stream sent with send_records, unpickling one object at a time as they arrive.
+        Args:
+            chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
+            byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object.
+        Returns:
+            Generator[Any, None, None]: The objects in the order they were sent.
+        """
+        from . import streaming
+        return streaming.receive_records(self.socket, chunk_size, byte_converter)
+
+    def send_many(self, objs: Iterable[Any], byte_converter: Callable[[Any], bytes] = None) -> int:
+        """
+        Send many python objects to the server at once, each as its own message. The messages are packed into one
+        buffer sent with one write, which is much faster than calling send for every small object. They can be
+        received one by one with receive or many at once with receive_many. See tcpsockets.batching.
+        Args:
+            objs(Iterable[Any]): The objects to be sent.
+            byte_converter(Callable[[Any], bytes]): Function to convert one object to bytes.
+
+        Returns:
+            int: The number of objects sent.
+        """
+        from . import batching
+        return batching.send_many(self.socket, objs, byte_converter)
+
+    def receive_many(self, max_n: int = 1024, timeout: float = None,
+                     byte_converter: Callable[[bytes], Any] = None) -> List[Any]:
+        """
+        Receive up to max_n python objects sent by the server, reading as much as is available at once and keeping
+        the bytes of incomplete messages for the next call. Blocks until at least one message has arrived. The first
+        call wraps the socket in a tcpsockets.batching.BufferedSocket, which the other receiving methods read through.
+        Args:
+            max_n(int): The largest number of objects to return. Defaults to 1024.
+            timeout(float): Seconds to wait for the first message. Defaults to None (wait forever).
+            byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object.
+        Returns:
+            List[Any]: The objects in the order they were sent, empty if the timeout passed.
+        """
+        from . import batching
+        if not isinstance(self.socket, batching.BufferedSocket):
+            self.socket = batching.BufferedSocket(self.socket)
+        return batching.receive_many(self.socket, max_n, timeout, byte_converter)
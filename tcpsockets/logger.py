@@ -9,13 +9,14 @@ from typing import TextIO
 import os
 
 logging: bool = True
-log_to: List[TextIO] = [sys.stdout]
+console: TextIO = sys.stdout
+log_to: List[TextIO] = [console]
 
 
 def close_log_files():
-    """Closes all default log files in the list logging.log_to."""
+    """Closes all default log files in the list logging.log_to except the console."""
     for file in log_to:
-        if file == sys.stdout:
+        if file in (console, sys.stdout, sys.stderr):
             continue
         file.close()
 
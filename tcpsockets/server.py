@@ -5,13 +5,19 @@ server.py
 
 import socket
 from . import logger
-from .settings import default_header_size, default_chunk_size, default_port, default_queue
+from . import settings
+from .transport import Transport, tcp_transport, send_frame, receive_exactly
+from .settings import default_header_size, default_chunk_size
 from abc import ABC, abstractmethod
 import threading
-from typing import Tuple, Any, Callable, List, Union
-import pickle
-import traceback
-from pathlib import Path
+from typing import Tuple, Any, Callable, Generator, Iterable, List, Union, TYPE_CHECKING
+from time import sleep
+
+if TYPE_CHECKING:
+    import ssl
+    from concurrent.futures import ThreadPoolExecutor
+    from pathlib import Path
+    from . import spill
 
 TimeoutException = socket.timeout
 
@@ -21,45 +27,180 @@ class Server(ABC):
     An Abstract Server object containing the ip and port it is bound to.
 
     Args:
-        ip (str): The ip address(IPV4) of the server. Defaults to local machine's ip
+        ip (str): The ip address(IPV4) of the server. Defaults to local machine's ip, which is looked up when the server
+                  binds.
         port(int): The port the server must be bound to. Defaults to tcpsockets.settings.default_port if it is not set
                    to None else raises Exception.
         queue(int): The waiting queue length of the server. Defaults to tcpsockets.settings.default_queue if it is not
                     set to None else raises Exception.
         background(bool): Whether the server runs in background (in separate thread) or not. Defaults to True
+        ssl_context(ssl.SSLContext): Server side TLS context used to wrap every accepted connection. Defaults to None
+                                     (plain TCP). See tcpsockets.tls.create_server_context.
+        handshake_workers(int): Number of worker threads used to run TLS handshakes off the accept loop. Defaults to 0
+                                which runs handshakes in the accept loop itself.
+        transport(Transport): The transport to bind to, see tcpsockets.transport. Overrides ip and port. Defaults to
+                              TCP over IPV4 (or IPV6 if ip is an IPV6 address) at ip and port.
+        shared_memory(bool): Whether clients offer shared memory ring buffers, see tcpsockets.shm. Clients on the same
+                             host then communicate through shared memory, others stay on the socket. Every client must
+                             be a ConnectedServer with shared_memory set to True. Defaults to False.
+        spill_threshold(int): Messages larger than this many bytes are received into memory mapped temporary files
+                              instead of memory, see tcpsockets.spill. Defaults to None (never spill by size).
+        max_receive_memory(int): The number of bytes all clients together may hold in memory for messages being
+                                 received. Messages that do not fit are spilled. Defaults to None (no limit).
+        wait_for_memory(bool): Whether messages that do not fit in max_receive_memory wait for memory to be released
+                               instead of being spilled. Defaults to False.
     Attributes:
-        ip (str): The ip address(IPV4) of the server.
-        port(str): The port the server is bound to.
+        ip (str): The ip address of the server, or the socket path for Unix domain sockets.
+        port(str): The port the server is bound to. If port 0 is used, this is the port picked by the OS. None for
+                   Unix domain sockets.
+        transport(Transport): The transport the server is bound to.
         socket(socket.socket): Reference to the socket object.
         background(bool): Whether the server runs in separate thread or not.
         running(bool): Whether the server is running or not.
         server_thread(threading.Thread): The Thread in which the server will run if background is True.
+        ssl_context(Union[None, ssl.SSLContext]): The TLS context used for accepted connections.
+        handshake_pool(Union[None, ThreadPoolExecutor]): The pool running TLS handshakes if handshake_workers is set.
+        handshake_timeout(float): A class variable giving the seconds a client may take to complete the TLS
+                                  handshake, or to send its shared memory offer, before it is dropped, so stalled
+                                  clients cannot hold the accept loop or every handshake worker. Defaults to 10.
+        shared_memory(bool): Whether clients offer shared memory ring buffers.
+        spill_threshold(Union[None, int]): The size above which received messages are spilled to disk.
+        memory_budget(Union[None, spill.MemoryBudget]): The budget shared by all clients if max_receive_memory is set.
     """
+    handshake_timeout: float = 10
 
-    def __init__(self, ip: str = socket.gethostbyname(socket.gethostname()), port: int = None, queue: int = None,
-                 background: bool = True):
+    def __init__(self, ip: str = None, port: int = None, queue: int = None,
+                 background: bool = True, ssl_context: "ssl.SSLContext" = None, handshake_workers: int = 0,
+                 transport: Transport = None, shared_memory: bool = False, spill_threshold: int = None,
+                 max_receive_memory: int = None, wait_for_memory: bool = False):
         self.background: bool = background
         self.running: bool = False
-        self.port: int = port
-        if self.port is None:
-            if default_port is None:
-                raise Exception("Either Server port or Default Port must be set.")
-            self.port = default_port
+        if transport is None:
+            if port is None:
+                if settings.default_port is None:
+                    raise Exception("Either Server port or Default Port must be set.")
+                port = settings.default_port
+            transport = tcp_transport(ip, port)
+        self.transport: Transport = transport
         self.queue = queue
         if self.queue is None:
-            if default_queue is None:
+            if settings.default_queue is None:
                 raise Exception("Either queue parameter or Default Queue must be set.")
-            self.queue = default_queue
-
-        self.ip: str = ip
+            self.queue = settings.default_queue
+
+        self.ssl_context: Union[None, "ssl.SSLContext"] = ssl_context
+        self.shared_memory: bool = shared_memory
+        self.spill_threshold: Union[None, int] = spill_threshold
+        self.memory_budget: Union[None, "spill.MemoryBudget"] = None
+        if max_receive_memory is not None:
+            from . import spill
+            self.memory_budget = spill.MemoryBudget(max_receive_memory, wait_for_memory)
+        self.handshake_pool: Union[None, "ThreadPoolExecutor"] = None
+        if self.ssl_context is not None and handshake_workers:
+            from concurrent.futures import ThreadPoolExecutor
+            self.handshake_pool = ThreadPoolExecutor(handshake_workers, thread_name_prefix="tcpsockets-handshake")
         logger.log("Creating server socket")
-        self.socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        logger.log(f"Binding socket to {self.ip} at {self.port}")
-        self.socket.bind((self.ip, self.port))
+        self.socket: socket.socket = self.transport.create_socket()
+        logger.log(f"Binding socket to {self.transport}")
+        self.transport.bind(self.socket)
+        self.ip: str = self.transport.ip
+        self.port: Union[None, int] = self.transport.port
+        self.socket.listen(self.queue)
         if self.background:
             self.server_thread = threading.Thread(target=self.starter)
         self.closing = False
 
+    def secure(self, sckt: socket.socket) -> socket.socket:
+        """
+        Wrap an accepted socket with the server's ssl_context and perform the TLS handshake, failing with
+        socket.timeout if it takes longer than handshake_timeout. Returns the socket unchanged if the server has no
+        ssl_context.
+        Args:
+            sckt(socket.socket): The socket returned by socket.accept().
+
+        Returns:
+            socket.socket: The socket to communicate with the client over.
+        """
+        if self.ssl_context is None:
+            return sckt
+        timeout = sckt.gettimeout()
+        sckt.settimeout(self.handshake_timeout)
+        secured = self.ssl_context.wrap_socket(sckt, server_side=True)
+        secured.settimeout(timeout)
+        return secured
+
+    def accept_client(self, sckt: socket.socket, address: Any) -> Union[None, "Client"]:
+        """
+        Create the Client object for an accepted socket. Performs the TLS handshake if the server uses TLS.
+        Args:
+            sckt(socket.socket): The socket returned by socket.accept().
+            address(Any): The address returned by socket.accept().
+
+        Returns:
+            Union[None, Client]: The Client object, or None if the handshake failed.
+        """
+        address = self.transport.peer(address)
+        try:
+            new_client = Client(self.secure(sckt), address)
+        except OSError:
+            import traceback
+            logger.log(f"TLS handshake with {address} failed: {traceback.format_exc()}")
+            sckt.close()
+            return None
+        new_client.spill_threshold = self.spill_threshold
+        new_client.memory_budget = self.memory_budget
+        return new_client
+
+    def negotiate(self, client: "Client") -> bool:
+        """
+        Receive the client's shared memory offer if the server uses shared memory, see tcpsockets.shm. A client that
+        does not send its offer within handshake_timeout is dropped. Runs in the thread handling the client so that
+        waiting for the offer does not block other clients.
+        Args:
+            client(Client): The Client object returned by accept_client.
+
+        Returns:
+            bool: Whether the client can be handled. The client is closed if not.
+        """
+        if not self.shared_memory:
+            return True
+        from . import shm
+        timeout = client.socket.gettimeout()
+        client.socket.settimeout(self.handshake_timeout)
+        try:
+            if shm.accept(client):
+                logger.log(f"Client from {(client.ip, client.port)} uses shared memory")
+        except BaseException:
+            import traceback
+            logger.log(f"Shared memory negotiation with {(client.ip, client.port)} failed: {traceback.format_exc()}")
+            client.close()
+            return False
+        client.socket.settimeout(timeout)
+        return True
+
+    def wake(self) -> None:
+        """
+        Connect to the server once so that a blocking socket.accept returns. Used to stop the server.
+        Returns:
+            None
+        """
+        closer_socket = self.transport.create_socket()
+        try:
+            self.transport.connect(closer_socket)
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass
+        finally:
+            closer_socket.close()
+
+    def close(self) -> None:
+        """
+        Closes the server socket and releases the transport.
+        Returns:
+            None
+        """
+        self.socket.close()
+        self.transport.close()
+
     def handler(self, client: "Client") -> None:
         """
         The Function called when the client connects to the server. Must be overridden by inheritance or by calling
@@ -111,17 +252,20 @@ class Client:
 
     Args:
         sckt(socket.socket): reference to the client's socket returned by socket.accept()
-        address(Tuple[str,int]): a tuple containing the ip and the port.
+        address(Tuple[str,int]): a tuple containing the ip and the port. The ip is the socket path and the port is None
+                                 for Unix domain sockets.
     Attributes:
         total_client_connections(int): A Class variable which tracks the total number of client by tracking all its
                                        Objects.
         client_connection_id(int): An id uniquely identifying one instance of a connection. It is an int set to the
                                    total number of connections made just after the client joins.
         socket(socket.socket): reference to the client's socket returned by socket.accept()
-        ip(str): The ip address(IPV4) of the client returned by socket.accept()
+        ip(str): The ip address of the client returned by socket.accept()
         port(int): The port the client is connected to.
-
-
+        spill_threshold(Union[None, int]): Messages larger than this are received into memory mapped temporary files.
+                                           Set from the server, defaults to None.
+        memory_budget(Union[None, spill.MemoryBudget]): The budget received messages are held under. Set from the
+                                                        server, defaults to None.
     """
     total_client_connections: int = 0
 
@@ -131,6 +275,8 @@ class Client:
         self.socket: socket.socket = sckt
         self.ip: str = address[0]
         self.port: int = address[1]
+        self.spill_threshold: Union[None, int] = None
+        self.memory_budget: Union[None, "spill.MemoryBudget"] = None
 
     def close(self) -> None:
         """
@@ -156,13 +302,13 @@ class Client:
 
         """
         if byte_converter is None:
+            import pickle
             bytes_obj = pickle.dumps(obj)
         else:
             bytes_obj = byte_converter(obj)
         bytes_obj_size = len(bytes_obj)
         header = str(bytes_obj_size).ljust(default_header_size).encode("utf-8")
-        self.socket.send(header)
-        self.socket.send(bytes_obj)
+        send_frame(self.socket, header, bytes_obj)
 
     def send_to(self, obj: Any, client: "Client", byte_converter: Callable[[Any], bytes] = None):
         """
@@ -179,6 +325,7 @@ class Client:
             None
         """
         if byte_converter is None:
+            import pickle
             bytes_obj = pickle.dumps(obj)
         else:
             bytes_obj = byte_converter(obj)
@@ -190,24 +337,30 @@ class Client:
     def receive(self, chunk_size: int = None, byte_converter: Callable[[bytes], Any] = None) -> Any:
         """
         Receive a python object sent by the client. First receive a fixed length header then receive the pickled object
-        chunk by chunk using the chunk_size argument.
+        chunk by chunk using the chunk_size argument. Messages larger than spill_threshold, or not fitting in the
+        memory_budget, are received into a memory mapped temporary file, see tcpsockets.spill.
         Args:
             chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
-            byte_converter(Callable[[bytes], Any]): Function to convert bytes to object. 
+            byte_converter(Callable[[bytes], Any]): Function to convert bytes to object. Given an mmap.mmap instead of
+                                                    bytes if the message was spilled.
         Returns:
             Any: The object sent by the server
         """
         if chunk_size is None:
             chunk_size = default_chunk_size
-        obj_size_header: str = self.socket.recv(default_header_size).decode("utf-8")
+        obj_size_header: str = receive_exactly(self.socket, default_header_size, default_header_size).decode("utf-8")
         obj_size: int = int(obj_size_header.strip())
-        bytes_obj = b""
-        for _ in range(obj_size // chunk_size):
-            bytes_obj += self.socket.recv(chunk_size)
-        bytes_obj += self.socket.recv(obj_size % chunk_size)
-        return pickle.loads(bytes_obj) if byte_converter is None else byte_converter(bytes_obj)
+        if self.spill_threshold is not None or self.memory_budget is not None:
+            from . import spill
+            return spill.receive(self.socket, obj_size, chunk_size, byte_converter, self.spill_threshold,
+                                 self.memory_budget)
+        bytes_obj = receive_exactly(self.socket, obj_size, chunk_size)
+        if byte_converter is None:
+            import pickle
+            return pickle.loads(bytes_obj)
+        return byte_converter(bytes(bytes_obj))
 
-    def send_file(self, file_location: Path, chunk_size: int) -> None:
+    def send_file(self, file_location: "Path", chunk_size: int) -> None:
         """
         Send a file object in small chunks whose sizes are "chunk_size" each.
         Args:
@@ -217,12 +370,12 @@ class Client:
         self.send((file_location.name, file_location.stat().st_size))
         with open(file_location, "rb") as file:
             file_chunk = file.read(chunk_size)
-            self.socket.send(file_chunk)
+            self.socket.sendall(file_chunk)
             while file_chunk:
                 file_chunk = file.read(chunk_size)
-                self.socket.send(file_chunk)
+                self.socket.sendall(file_chunk)
 
-    def receive_file(self, file_save_location: Path, chunk_size: int) -> None:
+    def receive_file(self, file_save_location: "Path", chunk_size: int) -> None:
         """
         Receive a file object in small chunks whose sizes are "chunk_size" each.
         Args:
@@ -237,6 +390,90 @@ class Client:
                 byte_number += len(byte_chunk)
                 file.write(byte_chunk)
 
+    def send_stream(self, chunks: Iterable[bytes]) -> int:
+        """
+        Send a stream of byte chunks to the client, one frame per chunk followed by an end marker, without having to
+        know its total size or hold it in memory. See tcpsockets.streaming.
+        Args:
+            chunks(Iterable[bytes]): The chunks to be sent. Can be a generator producing them lazily.
+
+        Returns:
+            int: The number of bytes sent.
+        """
+        from . import streaming
+        return streaming.send_stream(self.socket, chunks)
+
+    def receive_stream(self, chunk_size: int = None) -> Generator[bytes, None, None]:
+        """
+        Receive a stream sent with send_stream. The chunks are yielded as soon as they arrive, while the rest of the
+        stream is still being sent. The generator must be exhausted before receiving anything else.
+        Args:
+            chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
+        Returns:
+            Generator[bytes, None, None]: The chunks in the order they were sent.
+        """
+        from . import streaming
+        return streaming.receive_stream(self.socket, chunk_size)
+
+    def send_records(self, records: Iterable[Any], byte_converter: Callable[[Any], bytes] = None) -> int:
+        """
+        Send a stream of python objects to the client, pickling one object at a time.
+        Args:
+            records(Iterable[Any]): The objects to be sent. Can be a generator producing them lazily.
+            byte_converter(Callable[[Any], bytes]): Function to convert one object to bytes.
+
+        Returns:
+            int: The number of objects sent.
+        """
+        from . import streaming
+        return streaming.send_records(self.socket, records, byte_converter)
+
+    def receive_records(self, chunk_size: int = None,
+                        byte_converter: Callable[[bytes], Any] = None) -> Generator[Any, None, None]:
+        """
+        Receive a stream sent with send_records, unpickling one object at a time as they arrive.
+        Args:
+            chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
+            byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object.
+        Returns:
+            Generator[Any, None, None]: The objects in the order they were sent.
+        """
+        from . import streaming
+        return streaming.receive_records(self.socket, chunk_size, byte_converter)
+
+    def send_many(self, objs: Iterable[Any], byte_converter: Callable[[Any], bytes] = None) -> int:
+        """
+        Send many python objects to the client at once, each as its own message. The messages are packed into one
+        buffer sent with one write, which is much faster than calling send for every small object. They can be
+        received one by one with receive or many at once with receive_many. See tcpsockets.batching.
+        Args:
+            objs(Iterable[Any]): The objects to be sent.
+            byte_converter(Callable[[Any], bytes]): Function to convert one object to bytes.
+
+        Returns:
+            int: The number of objects sent.
+        """
+        from . import batching
+        return batching.send_many(self.socket, objs, byte_converter)
+
+    def receive_many(self, max_n: int = 1024, timeout: float = None,
+                     byte_converter: Callable[[bytes], Any] = None) -> List[Any]:
+        """
+        Receive up to max_n python objects sent by the client, reading as much as is available at once and keeping
+        the bytes of incomplete messages for the next call. Blocks until at least one message has arrived. The first
+        call wraps the socket in a tcpsockets.batching.BufferedSocket, which the other receiving methods read through.
+        Args:
+            max_n(int): The largest number of objects to return. Defaults to 1024.
+            timeout(float): Seconds to wait for the first message. Defaults to None (wait forever).
+            byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object.
+        Returns:
+            List[Any]: The objects in the order they were sent, empty if the timeout passed.
+        """
+        from . import batching
+        if not isinstance(self.socket, batching.BufferedSocket):
+            self.socket = batching.BufferedSocket(self.socket)
+        return batching.receive_many(self.socket, max_n, timeout, byte_converter)
+
     def set_receive_timeout(self, timeout: int) -> None:
         """
         Sets the time out for Client.receive(). Raises socket.timeout after timeout.
@@ -267,6 +504,14 @@ class SequentialServer(Server):
             queue(int): The waiting queue length of the server. Defaults to tcpsockets.settings.default_queue
                         if it is not set to None else raises Exception.
             background(bool): Whether the server runs in background (in separate thread) or not. Defaults to True
+            ssl_context(ssl.SSLContext): Server side TLS context used to wrap every accepted connection. Handshakes
+                                         run in the accept loop as clients are handled one by one anyway.
+            transport(Transport): The transport to bind to, see tcpsockets.transport. Overrides ip and port.
+            shared_memory(bool): Whether clients on the same host communicate through shared memory, see
+                                 tcpsockets.shm. Defaults to False.
+            spill_threshold(int): Messages larger than this are spilled to disk, see tcpsockets.spill.
+            max_receive_memory(int): Cap on the memory held by messages being received by all clients at once.
+            wait_for_memory(bool): Whether messages over the cap wait for memory instead of being spilled.
         Attributes:
             handling(bool): A bool saying whether the server is handling a client or not.
             stopper_thread(threading.Thread): A Thread that is responsible for stopping the Server.
@@ -274,9 +519,14 @@ class SequentialServer(Server):
                                                  If not handling then it is set to None.
         """
 
-    def __init__(self, ip: str = socket.gethostbyname(socket.gethostname()), port: int = None, queue: int = None,
-                 background: bool = True):
-        super(SequentialServer, self).__init__(ip, port, queue, background)
+    def __init__(self, ip: str = None, port: int = None, queue: int = None,
+                 background: bool = True, ssl_context: "ssl.SSLContext" = None, transport: Transport = None,
+                 shared_memory: bool = False, spill_threshold: int = None, max_receive_memory: int = None,
+                 wait_for_memory: bool = False):
+        super(SequentialServer, self).__init__(ip, port, queue, background, ssl_context, transport=transport,
+                                               shared_memory=shared_memory, spill_threshold=spill_threshold,
+                                               max_receive_memory=max_receive_memory,
+                                               wait_for_memory=wait_for_memory)
         self.handling: bool = False
         self.stopper_thread: threading.Thread = threading.Thread(target=self.stopper)
 
@@ -291,13 +541,8 @@ class SequentialServer(Server):
             None
         """
         while self.running or self.handling:
-            pass
-        closer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            closer_socket.connect((self.ip, self.port))
-        except ConnectionRefusedError:
-            pass
-        closer_socket.close()
+            sleep(0.01)
+        self.wake()
 
     def starter(self) -> None:
         """
@@ -307,22 +552,27 @@ class SequentialServer(Server):
         """
         self.running = True
         self.stopper_thread.start()
-        logger.log(f"Listening for connections on {self.ip} at {self.port}")
-        self.socket.listen(self.queue)
+        logger.log(f"Listening for connections on {self.transport}")
         client, address = self.socket.accept()
         while self.running:
             self.handling = True
-            self.current_client = Client(client, address)
+            self.current_client = self.accept_client(client, address)
+            if self.current_client is None or not self.negotiate(self.current_client):
+                self.handling = False
+                client, address = self.socket.accept()
+                continue
+            address = self.current_client.ip, self.current_client.port
             logger.log(f"Connection from {address}")
             try:
                 self.handler(self.current_client)
             except BaseException:
+                import traceback
                 logger.log(f"Client from {address} got disconnected due to an error: {traceback.format_exc()}")
             logger.log(f"Client from {address} disconnected")
             self.handling = False
             self.current_client = None
             client, address = self.socket.accept()
-        self.socket.close()
+        self.close()
         logger.log(f"Closed server")
         logger.close_log_files()
 
@@ -347,6 +597,16 @@ class ParallelServer(Server):
             queue(int): The waiting queue length of the server. Defaults to tcpsockets.settings.default_queue if
                         it is not set to None else raises Exception.
             background(bool): Whether the server runs in background (in separate thread) or not. Defaults to True
+            ssl_context(ssl.SSLContext): Server side TLS context used to wrap every accepted connection. Defaults to
+                                         None (plain TCP).
+            handshake_workers(int): Number of worker threads used to run TLS handshakes so that a slow handshake does
+                                    not block the accept loop. Defaults to 0 (handshakes run in the accept loop).
+            transport(Transport): The transport to bind to, see tcpsockets.transport. Overrides ip and port.
+            shared_memory(bool): Whether clients on the same host communicate through shared memory, see
+                                 tcpsockets.shm. Defaults to False.
+            spill_threshold(int): Messages larger than this are spilled to disk, see tcpsockets.spill.
+            max_receive_memory(int): Cap on the memory held by messages being received by all clients at once.
+            wait_for_memory(bool): Whether messages over the cap wait for memory instead of being spilled.
         Attributes:
             client_threads(List[threading.Thread]): A list of all threads that have handled or are handling clients.
             clients(List[Client]): List of all the Clients currently being handled.
@@ -356,9 +616,12 @@ class ParallelServer(Server):
 
     """
 
-    def __init__(self, ip: str = socket.gethostbyname(socket.gethostname()), port: int = None, queue: int = None,
-                 background: bool = True):
-        super(ParallelServer, self).__init__(ip, port, queue, background)
+    def __init__(self, ip: str = None, port: int = None, queue: int = None,
+                 background: bool = True, ssl_context: "ssl.SSLContext" = None, handshake_workers: int = 0,
+                 transport: Transport = None, shared_memory: bool = False, spill_threshold: int = None,
+                 max_receive_memory: int = None, wait_for_memory: bool = False):
+        super(ParallelServer, self).__init__(ip, port, queue, background, ssl_context, handshake_workers, transport,
+                                             shared_memory, spill_threshold, max_receive_memory, wait_for_memory)
         self.client_threads: List[threading.Thread] = []
         self.clients: List[Client] = []
         self.stopper_thread: threading.Thread = threading.Thread(target=self.stopper)
@@ -367,8 +630,8 @@ class ParallelServer(Server):
 
     def client_func(self, client: Client) -> None:
         """
-        This method handles exceptions in the handler method and closes client socket after handling.
-        The client_thread is created from this function
+        This method negotiates shared memory if the server uses it, handles exceptions in the handler method and
+        closes client socket after handling. The client_thread is created from this function
         Args:
             client(Client): The client that needs to be handled.
 
@@ -376,8 +639,10 @@ class ParallelServer(Server):
             None
         """
         try:
-            self.handler(client)
+            if self.negotiate(client):
+                self.handler(client)
         except BaseException:
+            import traceback
             logger.log(
                 f"Client from {(client.ip, client.port)} got disconnected due to an error:\n{traceback.format_exc()}")
         for index, other_clnt in enumerate(self.clients):
@@ -387,6 +652,26 @@ class ParallelServer(Server):
                 logger.log(f"Client from {(client.ip, client.port)} disconnected")
                 return
 
+    def add_client(self, client: socket.socket, address: Tuple[str, int]) -> None:
+        """
+        Creates the Client object (see accept_client) and the thread handling it. Runs in the handshake_pool if
+        handshake_workers was set, else in the accept loop.
+        Args:
+            client(socket.socket): The socket returned by socket.accept().
+            address(Tuple[str, int]): The address returned by socket.accept().
+
+        Returns:
+            None
+        """
+        new_client = self.accept_client(client, address)
+        if new_client is None:
+            return
+        self.clients.append(new_client)
+        logger.log(f"Connection from {(new_client.ip, new_client.port)}")
+        handler_thread = threading.Thread(target=lambda: self.client_func(new_client))
+        self.client_threads.append(handler_thread)
+        handler_thread.start()
+
     def starter(self):
         """
         The starter method is responsible for accepting connections from clients passing them to the client_handler and
@@ -396,20 +681,19 @@ class ParallelServer(Server):
                 """
         self.running = True
         self.stopper_thread.start()
-        logger.log(f"Listening for connections on {self.ip} at {self.port}")
-        self.socket.listen(self.queue)
+        logger.log(f"Listening for connections on {self.transport}")
         client, address = self.socket.accept()
         while self.running:
-            new_client = Client(client, address)
-            self.clients.append(new_client)
-            logger.log(f"Connection from {address}")
-            handler_thread = threading.Thread(target=lambda: self.client_func(new_client))
-            self.client_threads.append(handler_thread)
-            handler_thread.start()
+            if self.handshake_pool is None:
+                self.add_client(client, address)
+            else:
+                self.handshake_pool.submit(self.add_client, client, address)
             client, address = self.socket.accept()
+        if self.handshake_pool is not None:
+            self.handshake_pool.shutdown(wait=True)
         while self.handling:
-            pass
-        self.socket.close()
+            sleep(0.01)
+        self.close()
         logger.log(f"Closed server")
         logger.close_log_files()
 
@@ -430,15 +714,9 @@ class ParallelServer(Server):
         Returns:
             None
         """
-        while 1:
-            if not self.running and not self.handling:
-                closer_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                try:
-                    closer_socket.connect((self.ip, self.port))
-                except ConnectionRefusedError:
-                    return
-                closer_socket.close()
-                break
+        while self.running or self.handling:
+            sleep(0.01)
+        self.wake()
 
     def stop_running(self) -> None:
         """
@@ -0,0 +1,363 @@
+"""
+shm.py
+    Provides a shared memory path for peers on the same host. After the normal connect, the client offers a pair of
+    multiprocessing.shared_memory ring buffers. If the server can attach to them both peers exchange all further bytes
+    through the ring buffers and only use the socket to wake each other up. If the server cannot attach (it is on
+    another host) the connection silently stays on the socket.
+
+    The rings keep the payload out of the kernel's socket buffers, but every blocked read or write still costs a wake
+    up over the socket. Whether that is faster than loopback TCP depends on the host; measure with the benchmark in
+    tcpsockets/test/test_shm.py before relying on it. On a single core machine it is not faster.
+"""
+import os
+import secrets
+import select
+import socket
+import struct
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, List, Union
+
+default_ring_size: int = 16 * 1024 * 1024
+offer_tag: str = "tcpsockets.shm"
+name_prefix: str = "tcpsockets_"
+wait_interval: float = 0.05
+
+_position = struct.Struct("Q")
+_write_position_offset = 0
+_read_position_offset = 8
+_reader_waiting_offset = 16
+_writer_waiting_offset = 17
+_closed_offset = 18
+_capacity_offset = 24
+_nonce_offset = 32
+_nonce_size = 16
+_header_size = 64
+
+
+class RingBuffer:
+    """
+    A single producer single consumer byte ring inside a shared memory block. The header holds the total number of
+    bytes written and read so far, flags telling whether the reader or writer is blocked and the capacity.
+
+    Args:
+        shared_memory(SharedMemory): The shared memory block holding the ring.
+    Attributes:
+        shared_memory(SharedMemory): The shared memory block holding the ring.
+        capacity(int): The number of bytes the ring can hold.
+    """
+
+    def __init__(self, shared_memory: SharedMemory):
+        self.shared_memory: SharedMemory = shared_memory
+        self.buffer: memoryview = shared_memory.buf
+        self.capacity: int = _position.unpack_from(self.buffer, _capacity_offset)[0]
+        self.data: memoryview = self.buffer[_header_size:_header_size + self.capacity]
+
+    @classmethod
+    def create(cls, capacity: int, nonce: bytes) -> "RingBuffer":
+        """
+        Create a new shared memory block holding an empty ring.
+        Args:
+            capacity(int): The number of bytes the ring can hold.
+            nonce(bytes): Random bytes the peer checks to make sure it attached to this very block.
+
+        Returns:
+            RingBuffer: The new ring.
+        """
+        shared_memory = SharedMemory(name_prefix + secrets.token_hex(8), create=True, size=_header_size + capacity)
+        shared_memory.buf[:_header_size] = bytes(_header_size)
+        _position.pack_into(shared_memory.buf, _capacity_offset, capacity)
+        shared_memory.buf[_nonce_offset:_nonce_offset + _nonce_size] = nonce
+        return cls(shared_memory)
+
+    @classmethod
+    def attach(cls, name: str, nonce: bytes) -> "RingBuffer":
+        """
+        Attach to a ring created by another process. Only blocks named with name_prefix are opened, and nothing is
+        written to the block unless it holds the expected nonce. The creator owns and unlinks the block, so the block
+        is kept away from the multiprocessing resource tracker of the attaching process.
+        Args:
+            name(str): The name of the shared memory block.
+            nonce(bytes): The nonce the creator wrote into the block.
+
+        Returns:
+            RingBuffer: The attached ring.
+        """
+        if not isinstance(name, str) or not name.startswith(name_prefix):
+            raise ValueError(f"{name!r} is not a tcpsockets ring buffer")
+        try:
+            shared_memory = SharedMemory(name, track=False)
+        except TypeError:
+            shared_memory = SharedMemory(name)
+            if os.name == "posix":
+                resource_tracker.unregister("/" + shared_memory.name, "shared_memory")
+        header = shared_memory.buf[:_header_size]
+        matches = (len(header) == _header_size and bytes(header[_nonce_offset:_nonce_offset + _nonce_size]) == nonce
+                   and _position.unpack_from(header, _capacity_offset)[0] <= shared_memory.size - _header_size)
+        header.release()
+        if not matches:
+            shared_memory.close()
+            raise ValueError(f"{name!r} is not the offered ring buffer")
+        return cls(shared_memory)
+
+    @property
+    def nonce(self) -> bytes:
+        return bytes(self.buffer[_nonce_offset:_nonce_offset + _nonce_size])
+
+    def _get(self, offset: int) -> int:
+        return _position.unpack_from(self.buffer, offset)[0]
+
+    def _set(self, offset: int, value: int) -> None:
+        _position.pack_into(self.buffer, offset, value)
+
+    @property
+    def used(self) -> int:
+        return self._get(_write_position_offset) - self._get(_read_position_offset)
+
+    @property
+    def reader_waiting(self) -> bool:
+        return bool(self.buffer[_reader_waiting_offset])
+
+    @reader_waiting.setter
+    def reader_waiting(self, value: bool) -> None:
+        self.buffer[_reader_waiting_offset] = value
+
+    @property
+    def writer_waiting(self) -> bool:
+        return bool(self.buffer[_writer_waiting_offset])
+
+    @writer_waiting.setter
+    def writer_waiting(self, value: bool) -> None:
+        self.buffer[_writer_waiting_offset] = value
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.buffer[_closed_offset])
+
+    def write(self, data: memoryview) -> int:
+        """
+        Copy as much of data as fits into the ring.
+        Args:
+            data(memoryview): The bytes to be written.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        write_position = self._get(_write_position_offset)
+        size = min(len(data), self.capacity - (write_position - self._get(_read_position_offset)))
+        start = write_position % self.capacity
+        first = min(size, self.capacity - start)
+        self.data[start:start + first] = data[:first]
+        if size > first:
+            self.data[:size - first] = data[first:size]
+        self._set(_write_position_offset, write_position + size)
+        return size
+
+    def read_into(self, buffer: memoryview) -> int:
+        """
+        Move as many bytes as available, up to the size of buffer, out of the ring.
+        Args:
+            buffer(memoryview): Where the bytes are copied to.
+
+        Returns:
+            int: The number of bytes read.
+        """
+        read_position = self._get(_read_position_offset)
+        size = min(len(buffer), self._get(_write_position_offset) - read_position)
+        start = read_position % self.capacity
+        first = min(size, self.capacity - start)
+        buffer[:first] = self.data[start:start + first]
+        if size > first:
+            buffer[first:size] = self.data[:size - first]
+        self._set(_read_position_offset, read_position + size)
+        return size
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Mark the ring closed and release the shared memory block.
+        Args:
+            unlink(bool): Whether to also destroy the block.
+
+        Returns:
+            None
+        """
+        self.buffer[_closed_offset] = 1
+        self.detach()
+        if unlink:
+            self.shared_memory.unlink()
+
+    def detach(self) -> None:
+        """
+        Release the shared memory block without marking the ring closed.
+        Returns:
+            None
+        """
+        self.data.release()
+        self.buffer = None
+        self.shared_memory.close()
+
+
+class SharedMemorySocket:
+    """
+    A socket like object sending through one ring buffer and receiving from another. The wrapped socket only carries
+    one byte wake up notifications when the peer is blocked on a ring, with Nagle's algorithm turned off so that they
+    are not held back. Every other socket attribute is forwarded to the wrapped socket.
+
+    Args:
+        sckt(socket.socket): The connected socket used for wake ups.
+        inbound(RingBuffer): The ring the peer writes to.
+        outbound(RingBuffer): The ring the peer reads from.
+    Attributes:
+        socket(socket.socket): The connected socket used for wake ups.
+    """
+
+    def __init__(self, sckt: socket.socket, inbound: RingBuffer, outbound: RingBuffer):
+        self.socket: socket.socket = sckt
+        self.inbound: RingBuffer = inbound
+        self.outbound: RingBuffer = outbound
+        self.timeout: Union[None, float] = sckt.gettimeout()
+        self.peer_closed: bool = False
+        if sckt.family in (socket.AF_INET, socket.AF_INET6):
+            sckt.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.socket, name)
+
+    def settimeout(self, timeout: Union[None, float]) -> None:
+        self.timeout = timeout
+
+    def gettimeout(self) -> Union[None, float]:
+        return self.timeout
+
+    def _wake(self) -> None:
+        try:
+            self.socket.send(b"\0")
+        except OSError:
+            self.peer_closed = True
+
+    def _wait(self, deadline: Union[None, float]) -> None:
+        """Block until the peer sends a wake up, the peer closes or the deadline passes."""
+        interval = wait_interval
+        if deadline is not None:
+            interval = min(interval, deadline - time.monotonic())
+            if interval <= 0:
+                raise socket.timeout("timed out")
+        readable, _, _ = select.select([self.socket], [], [], interval)
+        if readable and not self.socket.recv(4096):
+            self.peer_closed = True
+
+    def _deadline(self) -> Union[None, float]:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def send(self, data: Any) -> int:
+        view = memoryview(data).cast("B")
+        deadline = self._deadline()
+        while True:
+            if self.outbound.closed or self.peer_closed:
+                raise BrokenPipeError("Peer closed the shared memory connection")
+            sent = self.outbound.write(view)
+            if sent or not len(view):
+                if self.outbound.reader_waiting:
+                    self.outbound.reader_waiting = False
+                    self._wake()
+                return sent
+            self.outbound.writer_waiting = True
+            if self.outbound.used == self.outbound.capacity:
+                self._wait(deadline)
+            self.outbound.writer_waiting = False
+
+    def sendall(self, data: Any) -> None:
+        view = memoryview(data).cast("B")
+        while len(view):
+            view = view[self.send(view):]
+
+    def recv_into(self, buffer: Any, nbytes: int = 0, flags: int = 0) -> int:
+        view = memoryview(buffer).cast("B")
+        if nbytes:
+            view = view[:nbytes]
+        deadline = self._deadline()
+        while True:
+            received = self.inbound.read_into(view)
+            if received or not len(view):
+                if self.inbound.writer_waiting:
+                    self.inbound.writer_waiting = False
+                    self._wake()
+                return received
+            if self.peer_closed or self.inbound.closed:
+                return 0
+            self.inbound.reader_waiting = True
+            if not self.inbound.used:
+                self._wait(deadline)
+            self.inbound.reader_waiting = False
+
+    def recv(self, bufsize: int, flags: int = 0) -> bytes:
+        buffer = bytearray(bufsize)
+        return bytes(buffer[:self.recv_into(buffer)])
+
+    def close(self) -> None:
+        if self.inbound.buffer is not None:
+            self.inbound.close()
+            self.outbound.close()
+            self._wake()
+        self.socket.close()
+
+
+def offer(connection: Any, ring_size: int = None) -> None:
+    """
+    Offer a pair of shared memory ring buffers to the server, replacing connection.socket with a SharedMemorySocket if
+    the server attaches to them. Called by tcpsockets.client.ConnectedServer after connecting.
+    Args:
+        connection(tcpsockets.client.ConnectedServer): The freshly connected connection.
+        ring_size(int): The capacity of each ring. Defaults to tcpsockets.shm.default_ring_size.
+
+    Returns:
+        None
+    """
+    if ring_size is None:
+        ring_size = default_ring_size
+    nonce = os.urandom(_nonce_size)
+    to_server = RingBuffer.create(ring_size, nonce)
+    to_client = RingBuffer.create(ring_size, nonce)
+    try:
+        connection.send((offer_tag, to_server.shared_memory.name, to_client.shared_memory.name, nonce))
+        accepted = connection.receive()
+    except BaseException:
+        to_server.close(unlink=True)
+        to_client.close(unlink=True)
+        raise
+    to_server.shared_memory.unlink()
+    to_client.shared_memory.unlink()
+    if accepted:
+        connection.socket = SharedMemorySocket(connection.socket, to_client, to_server)
+    else:
+        to_server.close()
+        to_client.close()
+
+
+def accept(client: Any) -> bool:
+    """
+    Receive the shared memory offer made by tcpsockets.shm.offer and attach to the rings if they exist on this host,
+    replacing client.socket with a SharedMemorySocket. Called by tcpsockets.server servers for every accepted client.
+    Args:
+        client(tcpsockets.server.Client): The freshly accepted client.
+
+    Returns:
+        bool: Whether the shared memory fast path is used.
+    """
+    offered = client.receive()
+    if not (isinstance(offered, tuple) and len(offered) == 4 and offered[0] == offer_tag):
+        raise Exception(f"Expected a shared memory offer but received {offered!r}")
+    _, to_server_name, to_client_name, nonce = offered
+    rings: List[RingBuffer] = []
+    try:
+        for name in (to_server_name, to_client_name):
+            rings.append(RingBuffer.attach(name, nonce))
+    except (FileNotFoundError, PermissionError, ValueError):
+        for ring in rings:
+            ring.detach()
+        client.send(False)
+        return False
+    client.send(True)
+    client.socket = SharedMemorySocket(client.socket, *rings)
+    return True
@@ -0,0 +1,140 @@
+"""
+spill.py
+    Provides receiving of large messages into memory mapped temporary files instead of the heap, and a budget limiting
+    the total memory used by the messages a server is receiving at the same time.
+"""
+import mmap
+import socket
+import tempfile
+import threading
+from .transport import receive_into, receive_exactly
+from typing import Any, Callable, Union
+
+spill_directory: Union[None, str] = None
+release_interval: int = 16 * 1024 * 1024
+
+
+class MemoryBudget:
+    """
+    The number of bytes that may be held in memory by messages being received at the same time. A message that does
+    not fit in the budget is spilled to disk, or waits until enough memory is released if wait is True.
+
+    Args:
+        limit(int): The number of bytes that may be in use at once.
+        wait(bool): Whether a message that does not fit waits for memory instead of being spilled. Messages larger
+                    than the whole limit are always spilled. Defaults to False.
+    Attributes:
+        limit(int): The number of bytes that may be in use at once.
+        in_use(int): The number of bytes currently in use.
+        spilled(int): The number of messages that were spilled because they did not fit.
+    """
+
+    def __init__(self, limit: int, wait: bool = False):
+        self.limit: int = limit
+        self.wait: bool = wait
+        self.in_use: int = 0
+        self.spilled: int = 0
+        self.available = threading.Condition()
+
+    def reserve(self, size: int) -> bool:
+        """
+        Reserve memory for a message.
+        Args:
+            size(int): The size of the message.
+
+        Returns:
+            bool: Whether the memory was reserved. If not, the message must be spilled.
+        """
+        with self.available:
+            if size > self.limit or (not self.wait and self.in_use + size > self.limit):
+                self.spilled += 1
+                return False
+            self.available.wait_for(lambda: self.in_use + size <= self.limit)
+            self.in_use += size
+            return True
+
+    def release(self, size: int) -> None:
+        """
+        Release memory reserved for a message.
+        Args:
+            size(int): The size of the message.
+
+        Returns:
+            None
+        """
+        with self.available:
+            self.in_use -= size
+            self.available.notify_all()
+
+
+def receive_to_file(sckt: socket.socket, size: int, chunk_size: int) -> mmap.mmap:
+    """
+    Receive size bytes with recv_into straight into a memory mapped temporary file. Received pages are dropped from the
+    process every release_interval bytes, so the resident memory stays bounded however large the message is.
+    Args:
+        sckt(socket.socket): The connected socket.
+        size(int): The number of bytes to receive.
+        chunk_size(int): The largest number of bytes to receive at once.
+
+    Returns:
+        mmap.mmap: The map of the received bytes. The temporary file is deleted once the map is closed.
+    """
+    with tempfile.TemporaryFile(dir=spill_directory) as file:
+        file.truncate(size)
+        mapped = mmap.mmap(file.fileno(), size)
+    view = memoryview(mapped)
+    try:
+        for start in range(0, size, release_interval):
+            end = min(start + release_interval, size)
+            receive_into(sckt, view[start:end], chunk_size)
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+    except BaseException:
+        view.release()
+        mapped.close()
+        raise
+    view.release()
+    return mapped
+
+
+def receive(sckt: socket.socket, size: int, chunk_size: int, byte_converter: Callable[[Any], Any] = None,
+            spill_threshold: int = None, budget: MemoryBudget = None) -> Any:
+    """
+    Receive the payload of a message and convert it, spilling it to disk if it is larger than spill_threshold or does
+    not fit in the budget. Used by Client.receive and ConnectedServer.receive.
+    Args:
+        sckt(socket.socket): The connected socket.
+        size(int): The size of the payload given by the header.
+        chunk_size(int): The largest number of bytes to receive at once.
+        byte_converter(Callable[[Any], Any]): Function to convert the payload to an object. It is given bytes, or the
+                                              mmap.mmap of a spilled payload. Defaults to pickle.loads, in which case
+                                              the map is closed after unpickling.
+        spill_threshold(int): Payloads larger than this are spilled. Defaults to None (never spill by size).
+        budget(MemoryBudget): The budget the payload is held under while in memory. Defaults to None.
+
+    Returns:
+        Any: The converted object.
+    """
+    spilled = spill_threshold is not None and size > spill_threshold
+    reserved = False
+    if not spilled and budget is not None:
+        reserved = budget.reserve(size)
+        spilled = not reserved
+    if spilled and size:
+        mapped = receive_to_file(sckt, size, chunk_size)
+        if byte_converter is not None:
+            return byte_converter(mapped)
+        import pickle
+        try:
+            return pickle.loads(mapped)
+        finally:
+            mapped.close()
+    try:
+        bytes_obj = receive_exactly(sckt, size, chunk_size)
+        if byte_converter is None:
+            import pickle
+            return pickle.loads(bytes_obj)
+        return byte_converter(bytes(bytes_obj))
+    finally:
+        if reserved:
+            budget.release(size)
@@ -0,0 +1,113 @@
+"""
+streaming.py
+    Provides functions to send and receive streams of chunks whose total size does not need to be known in advance or
+    fit in memory. Every chunk is sent as its own frame, with the same fixed length size header as
+    Client.send/ConnectedServer.send, and a frame of size 0 marks the end of the stream. The receiver gets the chunks
+    from a generator as they arrive.
+"""
+import socket
+from .settings import default_header_size, default_chunk_size
+from .transport import send_frame, receive_exactly
+from typing import Any, Callable, Generator, Iterable
+
+end_marker: int = 0
+abort_marker: int = -1
+
+
+class StreamAborted(Exception):
+    """Raised by receive_stream when the sender failed to produce the rest of the stream."""
+
+
+def _header(size: int) -> bytes:
+    return str(size).ljust(default_header_size).encode("utf-8")
+
+
+def send_stream(sckt: socket.socket, chunks: Iterable[bytes]) -> int:
+    """
+    Send every chunk of an iterable as its own frame followed by the end marker. Empty chunks are skipped. If the
+    iterable raises, the receiver is told that the stream was aborted and the exception is re-raised.
+    Args:
+        sckt(socket.socket): The connected socket.
+        chunks(Iterable[bytes]): The chunks to be sent. Can be a generator producing them lazily.
+
+    Returns:
+        int: The number of bytes sent, headers excluded.
+    """
+    sent = 0
+    try:
+        for chunk in chunks:
+            if chunk:
+                send_frame(sckt, _header(len(chunk)), chunk)
+                sent += len(chunk)
+    except BaseException:
+        sckt.sendall(_header(abort_marker))
+        raise
+    sckt.sendall(_header(end_marker))
+    return sent
+
+
+def receive_stream(sckt: socket.socket, chunk_size: int = None) -> Generator[bytes, None, None]:
+    """
+    Receive a stream sent by send_stream, yielding every chunk as soon as it has arrived. The generator must be
+    exhausted before anything else is received from the socket.
+    Args:
+        sckt(socket.socket): The connected socket.
+        chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
+
+    Returns:
+        Generator[bytes, None, None]: The chunks in the order they were sent.
+    """
+    if chunk_size is None:
+        chunk_size = default_chunk_size
+    while True:
+        size = int(receive_exactly(sckt, default_header_size, default_header_size).decode("utf-8").strip())
+        if size == end_marker:
+            return
+        if size == abort_marker:
+            raise StreamAborted("The sender aborted the stream")
+        yield bytes(receive_exactly(sckt, size, chunk_size))
+
+
+def send_records(sckt: socket.socket, records: Iterable[Any], byte_converter: Callable[[Any], bytes] = None) -> int:
+    """
+    Send every object of an iterable as its own chunk of a stream, pickling them one at a time.
+    Args:
+        sckt(socket.socket): The connected socket.
+        records(Iterable[Any]): The objects to be sent. Can be a generator producing them lazily.
+        byte_converter(Callable[[Any], bytes]): Function to convert one object to bytes. Defaults to pickle.dumps.
+
+    Returns:
+        int: The number of records sent.
+    """
+    if byte_converter is None:
+        import pickle
+        byte_converter = pickle.dumps
+    count = 0
+
+    def chunks() -> Generator[bytes, None, None]:
+        nonlocal count
+        for record in records:
+            yield byte_converter(record)
+            count += 1
+
+    send_stream(sckt, chunks())
+    return count
+
+
+def receive_records(sckt: socket.socket, chunk_size: int = None,
+                    byte_converter: Callable[[bytes], Any] = None) -> Generator[Any, None, None]:
+    """
+    Receive a stream sent by send_records, yielding every object as soon as it has arrived.
+    Args:
+        sckt(socket.socket): The connected socket.
+        chunk_size(int): The amount of bytes to receive at once. Defaults to tcpsockets.settings.default_chunk_size.
+        byte_converter(Callable[[bytes], Any]): Function to convert bytes to one object. Defaults to pickle.loads.
+
+    Returns:
+        Generator[Any, None, None]: The objects in the order they were sent.
+    """
+    if byte_converter is None:
+        import pickle
+        byte_converter = pickle.loads
+    for chunk in receive_stream(sckt, chunk_size):
+        yield byte_converter(chunk)
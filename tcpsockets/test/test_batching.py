@@ -0,0 +1,104 @@
+from unittest import TestCase
+import unittest
+import pickle
+import socket
+import time
+from .. import batching, client, logger, server
+
+objs = [(index, "message", {"value": index * 2}) for index in range(5000)]
+small_obj = b"x" * 64
+benchmark_messages = 20000
+
+
+class BatchingTest(TestCase):
+    def setUp(self) -> None:
+        self.srvr = server.ParallelServer("127.0.0.1", 0)
+
+        @self.srvr.client_handler
+        def clnt_hndlr(clnt: server.Client):
+            request, count = clnt.receive()
+            received = []
+            if request == "one by one":
+                while len(received) < count:
+                    received.append(clnt.receive())
+            else:
+                while len(received) < count:
+                    received.extend(clnt.receive_many(count - len(received)))
+            if request == "echo":
+                clnt.send_many(received)
+            else:
+                clnt.send(len(received))
+            clnt.receive()
+
+        self.srvr.start()
+
+    def connect(self, on_connect) -> None:
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False)
+        conn.on_connection(lambda: (on_connect(conn), conn.send("quit")))
+        conn.connect()
+        conn.close()
+
+    def test_round_trip(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send(("echo", len(objs)))
+            self.assertEqual(conn.send_many(objs), len(objs))
+            received = [conn.receive() for _ in range(10)]
+            while len(received) < len(objs):
+                received.extend(conn.receive_many(100))
+            self.assertEqual(received, objs)
+            self.assertEqual(conn.receive_many(timeout=0.05), [])
+
+        self.connect(on_connect)
+
+    def test_leftovers_are_kept(self):
+        receiver, sender = socket.socketpair()
+        buffered = batching.BufferedSocket(receiver)
+        frames = b"".join(str(len(payload)).ljust(16).encode("utf-8") + payload
+                          for payload in map(pickle.dumps, ["first", "second", "x" * 100000]))
+        cut = len(frames) - 10
+        sender.sendall(frames[:cut])
+        received = []
+        while len(received) < 2:
+            received.extend(batching.receive_many(buffered, 10, timeout=1))
+        self.assertEqual(received, ["first", "second"])
+        self.assertEqual(batching.receive_many(buffered, 10, timeout=0.05), [])
+        sender.sendall(frames[cut:] + frames[:20])
+        self.assertEqual(batching.receive_many(buffered, 10, timeout=1), ["x" * 100000])
+        self.assertEqual(buffered.recv(100), frames[:20])
+        receiver.close()
+        sender.close()
+
+    def test_benchmark(self):
+        def run(request: str) -> float:
+            def on_connect(conn: client.ConnectedServer):
+                conn.send((request, benchmark_messages))
+                start = time.perf_counter()
+                if request == "one by one":
+                    for _ in range(benchmark_messages):
+                        conn.send(small_obj)
+                else:
+                    conn.send_many([small_obj] * benchmark_messages)
+                self.assertEqual(conn.receive(), benchmark_messages)
+                rates[request] = benchmark_messages / (time.perf_counter() - start)
+
+            self.connect(on_connect)
+            return rates[request]
+
+        rates = {}
+        logger.set_logging(False)
+        try:
+            one_by_one, batched = run("one by one"), run("batched")
+        finally:
+            logger.set_logging(True)
+        print(f"64 byte messages: send/receive {one_by_one:.0f}/s, send_many/receive_many {batched:.0f}/s")
+        self.assertGreater(batched, one_by_one)
+
+    def tearDown(self) -> None:
+        self.srvr.closing = True
+        self.srvr.stop_running()
+        while self.srvr.closing:
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
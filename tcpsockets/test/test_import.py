@@ -0,0 +1,50 @@
+from unittest import TestCase
+import unittest
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+package_root = Path(__file__).resolve().parents[2]
+deferred_modules = ["pickle", "traceback", "ssl", "multiprocessing", "concurrent.futures"]
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=package_root, capture_output=True, text=True, check=True)
+
+
+def new_modules(code: str) -> List[str]:
+    """Modules imported by running code in a fresh interpreter."""
+    return run_python("-c", f"import sys; before = set(sys.modules); {code}; "
+                            f"print(' '.join(set(sys.modules) - before))").stdout.split()
+
+
+class ImportTest(TestCase):
+    def test_package_imports_submodules_lazily(self):
+        self.assertEqual([module for module in new_modules("import tcpsockets") if module.startswith("tcpsockets")],
+                         ["tcpsockets"])
+        run_python("-c", "import tcpsockets; tcpsockets.server.ParallelServer; tcpsockets.client.ConnectedServer")
+
+    def test_heavy_imports_are_deferred(self):
+        imported = new_modules("import tcpsockets.server, tcpsockets.client")
+        for module in deferred_modules:
+            self.assertNotIn(module, imported)
+
+    def test_host_is_resolved_lazily(self):
+        run_python("-c", "import socket\n"
+                         "def fail(*args): raise AssertionError('host resolved')\n"
+                         "socket.gethostbyname = fail\n"
+                         "import tcpsockets.server, tcpsockets.client\n"
+                         "tcpsockets.server.ParallelServer('127.0.0.1', 0).close()")
+
+    def test_import_time_benchmark(self):
+        for statement in ("import tcpsockets", "import tcpsockets.server, tcpsockets.client"):
+            timings = run_python("-X", "importtime", "-c", statement).stderr.splitlines()
+            top_level = [line.split("|") for line in timings if line.startswith("import time:")
+                         and line.split("|")[2].startswith(" tcpsockets")]
+            cumulative = sum(int(fields[1]) for fields in top_level)
+            print(f"{statement}: {cumulative / 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
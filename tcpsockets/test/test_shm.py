@@ -0,0 +1,153 @@
+from unittest import TestCase
+import unittest
+import multiprocessing
+import os
+import socket
+import time
+from multiprocessing.shared_memory import SharedMemory
+from .. import client, server, logger, shm
+
+msg = ["a", range(10), {(1, 2, 3): 2 + 5j}]
+
+
+def echo_handler(clnt: server.Client):
+    while True:
+        recv_msg = clnt.receive(1024 * 1024)
+        if recv_msg is None:
+            return
+        clnt.send(recv_msg)
+
+
+def bulk_handler(clnt: server.Client):
+    buffer = memoryview(bytearray(1024 * 1024))
+    size = clnt.receive()
+    while size:
+        while size:
+            size -= clnt.socket.recv_into(buffer, min(size, len(buffer)))
+        clnt.send(True)
+        size = clnt.receive()
+
+
+def serve_in_process(pipe, shared_memory: bool):
+    logger.set_logging(False)
+    srvr = server.ParallelServer("127.0.0.1", 0, shared_memory=shared_memory)
+    srvr.client_handler(bulk_handler)
+    srvr.start()
+    pipe.send(srvr.port)
+    pipe.recv()
+    srvr.stop_running()
+
+
+class SharedMemoryTest(TestCase):
+    def setUp(self) -> None:
+        self.srvr = server.ParallelServer("127.0.0.1", 0, shared_memory=True)
+        self.srvr.client_handler(echo_handler)
+        self.srvr.start()
+
+    def test_sending_receiving(self):
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False, shared_memory=True)
+
+        @conn.on_connection
+        def on_connect():
+            self.assertIsInstance(conn.socket, shm.SharedMemorySocket)
+            for obj in (msg, os.urandom(3 * shm.default_ring_size + 7), msg):
+                conn.send(obj)
+                self.assertEqual(conn.receive(1024 * 1024), obj)
+            conn.send(None)
+
+        conn.connect()
+        conn.close()
+
+    def test_fallback_to_socket(self):
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False)
+
+        @conn.on_connection
+        def on_connect():
+            conn.send((shm.offer_tag, "tcpsockets-missing-1", "tcpsockets-missing-2", os.urandom(16)))
+            self.assertFalse(conn.receive())
+            conn.send(msg)
+            self.assertEqual(conn.receive(), msg)
+            conn.send(None)
+
+        conn.connect()
+        conn.close()
+
+    def test_foreign_blocks_are_not_written(self):
+        blocks = [SharedMemory(create=True, size=4096), SharedMemory(shm.name_prefix + "foreign", create=True, size=4096)]
+        for block in blocks:
+            block.buf[:64] = bytes(range(64))
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False)
+
+        @conn.on_connection
+        def on_connect():
+            for block in blocks:
+                conn.send((shm.offer_tag, block.name, block.name, os.urandom(16)))
+                self.assertFalse(conn.receive())
+            conn.send(None)
+
+        conn.connect()
+        conn.close()
+        for block in blocks:
+            self.assertEqual(bytes(block.buf[:64]), bytes(range(64)))
+            block.close()
+            block.unlink()
+
+    def test_idle_peer_does_not_block_accepting(self):
+        idle = socket.create_connection(("127.0.0.1", self.srvr.port))
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False, shared_memory=True)
+        conn.set_receive_timeout(5)
+
+        @conn.on_connection
+        def on_connect():
+            conn.send(msg)
+            self.assertEqual(conn.receive(), msg)
+            conn.send(None)
+
+        conn.connect()
+        conn.close()
+        idle.close()
+
+    def tearDown(self) -> None:
+        self.srvr.closing = True
+        self.srvr.stop_running()
+        while self.srvr.closing:
+            pass
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork to start the server process")
+class SharedMemoryBenchmark(TestCase):
+    def test_benchmark(self):
+        # Compares bulk throughput of the shared memory path and loopback TCP. It is not expected to be faster
+        # everywhere: every blocked read or write still costs a wake up over the socket.
+        logger.set_logging(False)
+        context = multiprocessing.get_context("fork")
+        try:
+            for shared_memory in (False, True):
+                parent_pipe, child_pipe = context.Pipe()
+                process = context.Process(target=serve_in_process, args=(child_pipe, shared_memory))
+                process.start()
+                conn = client.ConnectedServer("127.0.0.1", parent_pipe.recv(), background=False,
+                                              shared_memory=shared_memory)
+                conn.on_connection(lambda: None)
+                conn.connect()
+                self.assertEqual(isinstance(conn.socket, shm.SharedMemorySocket), shared_memory)
+                payload = bytes(256 * 1024 * 1024)
+                repeats = 4
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    conn.send(len(payload))
+                    conn.socket.sendall(payload)
+                    self.assertTrue(conn.receive())
+                throughput = repeats * len(payload) / (time.perf_counter() - start)
+                conn.send(0)
+                conn.close()
+                parent_pipe.send("stop")
+                process.join()
+                print(f"bulk transfer over {'shared memory' if shared_memory else 'loopback tcp'}: "
+                      f"{throughput / 2 ** 30:.2f} GiB/s")
+        finally:
+            logger.set_logging(True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+from unittest import TestCase
+import unittest
+import mmap
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from .. import client, server, spill
+
+package_root = Path(__file__).resolve().parents[2]
+large = list(range(100000))
+
+rss_script = """
+import resource, socket, threading
+from tcpsockets import spill
+size, chunk = 512 * 1024 * 1024, b"x" * (1024 * 1024)
+receiver, sender = socket.socketpair()
+def send():
+    sender.sendall(str(size).ljust(16).encode("utf-8"))
+    for _ in range(size // len(chunk)):
+        sender.sendall(chunk)
+threading.Thread(target=send).start()
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+header = int(receiver.recv(16, socket.MSG_WAITALL).decode("utf-8"))
+received = spill.receive(receiver, header, 1024 * 1024, lambda mapped: (len(mapped), mapped[:1], mapped[-1:]),
+                         spill_threshold=1024 * 1024)
+assert received == (size, b"x", b"x"), received
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+"""
+
+
+class SpillTest(TestCase):
+    def setUp(self) -> None:
+        self.srvr = server.ParallelServer("127.0.0.1", 0, spill_threshold=1024, max_receive_memory=1024 * 1024)
+        self.converted = []
+
+        @self.srvr.client_handler
+        def clnt_hndlr(clnt: server.Client):
+            def converter(payload):
+                self.converted.append(type(payload))
+                return bytes(payload)
+
+            while True:
+                request = clnt.receive()
+                if request == "echo":
+                    clnt.send(clnt.receive())
+                elif request == "raw":
+                    clnt.send(clnt.receive(byte_converter=converter))
+                else:
+                    return
+
+        self.srvr.start()
+
+    def connect(self, on_connect) -> None:
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False, spill_threshold=1024)
+        conn.on_connection(lambda: (on_connect(conn), conn.send("quit")))
+        conn.connect()
+        conn.close()
+
+    def test_spilled_pickle(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send("echo")
+            conn.send(large)
+            self.assertEqual(conn.receive(), large)
+            conn.send("echo")
+            conn.send("small")
+            self.assertEqual(conn.receive(), "small")
+
+        self.connect(on_connect)
+
+    def test_spilled_byte_converter(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send("raw")
+            conn.send(b"a" * 5000, byte_converter=bytes)
+            self.assertEqual(conn.receive(), b"a" * 5000)
+            conn.send("raw")
+            conn.send(b"b" * 10, byte_converter=bytes)
+            self.assertEqual(conn.receive(), b"b" * 10)
+
+        self.connect(on_connect)
+        self.assertEqual(self.converted, [mmap.mmap, bytes])
+
+    def test_memory_budget(self):
+        budget = spill.MemoryBudget(100)
+        self.assertTrue(budget.reserve(60))
+        self.assertFalse(budget.reserve(60))
+        self.assertFalse(budget.reserve(101))
+        self.assertEqual(budget.spilled, 2)
+        waiting = spill.MemoryBudget(100, wait=True)
+        self.assertTrue(waiting.reserve(60))
+        reserved = threading.Event()
+        threading.Thread(target=lambda: reserved.set() if waiting.reserve(60) else None).start()
+        self.assertFalse(reserved.wait(0.1))
+        waiting.release(60)
+        self.assertTrue(reserved.wait(5))
+        self.assertEqual(waiting.in_use, 60)
+
+    def test_peak_rss_is_bounded(self):
+        rss_growth_kib = int(subprocess.run([sys.executable, "-c", rss_script], cwd=package_root,
+                                            capture_output=True, text=True, check=True).stdout)
+        print(f"peak RSS growth receiving 512MiB spilled: {rss_growth_kib / 1024:.1f}MiB")
+        self.assertLess(rss_growth_kib, 128 * 1024)
+
+    def tearDown(self) -> None:
+        self.srvr.closing = True
+        self.srvr.stop_running()
+        while self.srvr.closing:
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+from unittest import TestCase
+import unittest
+import threading
+import time
+from .. import client, server, streaming
+
+chunks = [b"a" * 10, b"", b"b" * 100000, b"c"]
+records = ["a", range(10), {(1, 2, 3): 2 + 5j}] * 100
+
+
+class StreamingTest(TestCase):
+    def setUp(self) -> None:
+        self.srvr = server.ParallelServer("127.0.0.1", 0)
+        self.first_chunk_sent = threading.Event()
+
+        @self.srvr.client_handler
+        def clnt_hndlr(clnt: server.Client):
+            request = clnt.receive()
+            if request == "chunks":
+                clnt.send_stream(clnt.receive_stream(4096))
+            elif request == "records":
+                clnt.send_records(clnt.receive_records(4096))
+            elif request == "slow":
+                def slow_chunks():
+                    yield b"first"
+                    self.first_chunk_sent.set()
+                    time.sleep(0.5)
+                    yield b"last"
+                clnt.send_stream(slow_chunks())
+            elif request == "abort":
+                def failing_chunks():
+                    yield b"first"
+                    raise ValueError("no more")
+                clnt.send_stream(failing_chunks())
+
+        self.srvr.start()
+
+    def connect(self, on_connect) -> None:
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False)
+        conn.on_connection(lambda: on_connect(conn))
+        conn.connect()
+        conn.close()
+
+    def test_chunks(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send("chunks")
+            self.assertEqual(conn.send_stream(iter(chunks)), sum(map(len, chunks)))
+            self.assertEqual(list(conn.receive_stream(4096)), [chunk for chunk in chunks if chunk])
+
+        self.connect(on_connect)
+
+    def test_records(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send("records")
+            self.assertEqual(conn.send_records(iter(records)), len(records))
+            self.assertEqual(list(conn.receive_records(4096)), records)
+
+        self.connect(on_connect)
+
+    def test_time_to_first_chunk(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send("slow")
+            stream = conn.receive_stream()
+            start = time.perf_counter()
+            self.assertEqual(next(stream), b"first")
+            print(f"time to first chunk: {(time.perf_counter() - start) * 1000:.2f}ms")
+            self.assertTrue(self.first_chunk_sent.is_set())
+            self.assertEqual(list(stream), [b"last"])
+            self.assertLess(time.perf_counter() - start, 5)
+
+        self.connect(on_connect)
+
+    def test_abort(self):
+        def on_connect(conn: client.ConnectedServer):
+            conn.send("abort")
+            stream = conn.receive_stream()
+            self.assertEqual(next(stream), b"first")
+            self.assertRaises(streaming.StreamAborted, list, stream)
+
+        self.connect(on_connect)
+
+    def tearDown(self) -> None:
+        self.srvr.closing = True
+        self.srvr.stop_running()
+        while self.srvr.closing:
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+from unittest import TestCase
+import unittest
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+from .. import client, server, logger, tls
+
+msg = ["a", range(10), {(1, 2, 3): 2 + 5j}]
+cert_dir = tempfile.TemporaryDirectory()
+cert_file = Path(cert_dir.name) / "cert.pem"
+key_file = Path(cert_dir.name) / "key.pem"
+
+
+def setUpModule():
+    if shutil.which("openssl") is None:
+        raise unittest.SkipTest("openssl is needed to generate self signed certificates")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+                    "-keyout", str(key_file), "-out", str(cert_file)],
+                   check=True, capture_output=True)
+
+
+def tearDownModule():
+    cert_dir.cleanup()
+
+
+class TLSTest(TestCase):
+    handshake_workers = 0
+
+    def setUp(self) -> None:
+        self.srvr = server.ParallelServer("127.0.0.1", 0, ssl_context=tls.create_server_context(cert_file, key_file),
+                                          handshake_workers=self.handshake_workers)
+
+        @self.srvr.client_handler
+        def clnt_hndlr(clnt: server.Client):
+            clnt.send(clnt.receive())
+
+        self.srvr.start()
+        self.client_context = tls.create_client_context(cert_file)
+
+    def connect_and_echo(self, conn: client.ConnectedServer) -> Tuple[str, bool]:
+        @conn.on_connection
+        def on_connect():
+            conn.send(msg)
+            self.assertEqual(conn.receive(), msg)
+
+        conn.connect()
+        version, session_reused = conn.socket.version(), conn.socket.session_reused
+        conn.close()
+        return version, session_reused
+
+    def test_sending_receiving(self):
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False, ssl_context=self.client_context)
+        self.assertEqual(self.connect_and_echo(conn), ("TLSv1.3", False))
+
+    def test_session_resumption(self):
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False, ssl_context=self.client_context)
+        self.assertFalse(self.connect_and_echo(conn)[1])
+        self.assertTrue(self.connect_and_echo(conn)[1])
+
+    def test_stalled_handshakes_time_out(self):
+        self.srvr.handshake_timeout = 0.2
+        stalled = [socket.create_connection(("127.0.0.1", self.srvr.port)) for _ in range(4)]
+        conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False, ssl_context=self.client_context)
+        self.assertEqual(self.connect_and_echo(conn), ("TLSv1.3", False))
+        for sckt in stalled:
+            sckt.close()
+
+    def test_handshake_benchmark(self):
+        logger.set_logging(False)
+        try:
+            for resume in (False, True):
+                conn = client.ConnectedServer("127.0.0.1", self.srvr.port, background=False,
+                                              ssl_context=self.client_context)
+                handshakes = 50
+                start = time.perf_counter()
+                reused = []
+                for _ in range(handshakes):
+                    if not resume:
+                        conn.tls_session = None
+                    reused.append(self.connect_and_echo(conn)[1])
+                elapsed = time.perf_counter() - start
+                self.assertEqual(reused[1:], [resume] * (handshakes - 1))
+                print(f"TLS handshakes/s {'with' if resume else 'without'} resumption: {handshakes / elapsed:.0f}")
+        finally:
+            logger.set_logging(True)
+
+    def tearDown(self) -> None:
+        self.srvr.closing = True
+        self.srvr.stop_running()
+        while self.srvr.closing:
+            pass
+
+
+class OffloadedHandshakeTLSTest(TLSTest):
+    handshake_workers = 4
+
+
+if __name__ == '__main__':
+    unittest.main()
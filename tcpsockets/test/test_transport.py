@@ -0,0 +1,145 @@
+from unittest import TestCase
+import unittest
+import os
+import socket
+import tempfile
+import time
+from pathlib import Path
+from .. import client, server, logger, transport
+
+msg = ["a", range(10), {(1, 2, 3): 2 + 5j}]
+socket_dir = tempfile.TemporaryDirectory()
+
+
+def ipv6_available() -> bool:
+    if not socket.has_ipv6:
+        return False
+    try:
+        with socket.socket(socket.AF_INET6, socket.SOCK_STREAM) as sckt:
+            sckt.bind(("::1", 0))
+    except OSError:
+        return False
+    return True
+
+
+class TransportTest(TestCase):
+    def serve(self, srvr: server.Server) -> None:
+        @srvr.client_handler
+        def clnt_hndlr(clnt: server.Client):
+            while True:
+                recv_msg = clnt.receive(1024 * 1024)
+                if recv_msg is None:
+                    return
+                clnt.send(recv_msg)
+
+        srvr.start()
+        self.srvr = srvr
+
+    def echo(self, conn: client.ConnectedServer, obj=msg) -> None:
+        conn.send(obj)
+        self.assertEqual(conn.receive(), obj)
+
+    def test_unix_domain_socket(self):
+        path = os.path.join(socket_dir.name, "test.sock")
+        for server_class in (server.SequentialServer, server.ParallelServer):
+            self.serve(server_class(transport=transport.UnixTransport(path)))
+            conn = client.ConnectedServer(transport=transport.UnixTransport(path), background=False)
+            conn.on_connection(lambda: (self.echo(conn), conn.send(None)))
+            conn.connect()
+            conn.close()
+            self.stop()
+            self.assertFalse(os.path.exists(path))
+
+    def test_unix_socket_path_in_use(self):
+        path = os.path.join(socket_dir.name, "in-use.sock")
+        Path(path).write_text("not a socket")
+        self.assertRaises(Exception, server.ParallelServer, transport=transport.UnixTransport(path))
+        self.assertEqual(Path(path).read_text(), "not a socket")
+        os.unlink(path)
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        self.serve(server.ParallelServer(transport=transport.UnixTransport(path)))
+        self.assertRaises(Exception, server.ParallelServer, transport=transport.UnixTransport(path))
+        conn = client.ConnectedServer(transport=transport.UnixTransport(path), background=False)
+        conn.on_connection(lambda: (self.echo(conn), conn.send(None)))
+        conn.connect()
+        conn.close()
+        self.stop()
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX") and os.uname().sysname == "Linux", "Linux only")
+    def test_abstract_namespace(self):
+        self.serve(server.ParallelServer(transport=transport.UnixTransport("tcpsockets-test", abstract=True)))
+        conn = client.ConnectedServer(transport=transport.UnixTransport("tcpsockets-test", abstract=True),
+                                      background=False)
+        conn.on_connection(lambda: (self.echo(conn), conn.send(None)))
+        conn.connect()
+        conn.close()
+        self.stop()
+
+    @unittest.skipUnless(ipv6_available(), "IPV6 is not available")
+    def test_ipv6_and_dual_stack(self):
+        self.serve(server.ParallelServer(transport=transport.TCP6Transport("::", 0, dual_stack=True)))
+        for ip in ("::1", "127.0.0.1"):
+            conn = client.ConnectedServer(ip, self.srvr.port, background=False)
+            conn.on_connection(lambda: (self.echo(conn), conn.send(None)))
+            conn.connect()
+            conn.close()
+        self.stop()
+
+    def test_send_file(self):
+        path = os.path.join(socket_dir.name, "file.sock")
+        sent_file = Path(__file__)
+        save_dir = tempfile.TemporaryDirectory()
+        srvr = server.ParallelServer(transport=transport.UnixTransport(path))
+        srvr.client_handler(lambda clnt: clnt.send_file(sent_file, 1000))
+        srvr.start()
+        self.srvr = srvr
+        conn = client.ConnectedServer(transport=transport.UnixTransport(path), background=False)
+        conn.on_connection(lambda: list(conn.receive_file(Path(save_dir.name), 1000)))
+        conn.connect()
+        conn.close()
+        self.stop()
+        self.assertEqual((Path(save_dir.name) / sent_file.name).read_bytes(), sent_file.read_bytes())
+        save_dir.cleanup()
+
+    def test_benchmark(self):
+        logger.set_logging(False)
+        try:
+            transports = {"tcp": lambda: transport.TCPTransport("127.0.0.1", 0),
+                          "uds": lambda: transport.UnixTransport(os.path.join(socket_dir.name, "bench.sock"))}
+            for name, make_transport in transports.items():
+                self.serve(server.ParallelServer(transport=make_transport()))
+                conn = client.ConnectedServer(transport=self.srvr.transport, background=False)
+                conn.on_connection(lambda: None)
+                conn.connect()
+                round_trips = 2000
+                start = time.perf_counter()
+                for _ in range(round_trips):
+                    conn.send(b"x")
+                    conn.receive()
+                latency = (time.perf_counter() - start) / round_trips
+                payload = bytes(4 * 1024 * 1024)
+                repeats = 10
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    conn.send(payload)
+                    conn.receive(1024 * 1024)
+                throughput = 2 * repeats * len(payload) / (time.perf_counter() - start)
+                conn.send(None)
+                conn.close()
+                self.stop()
+                print(f"{name}: round trip {latency * 1e6:.1f}us, throughput {throughput / 2 ** 20:.0f} MiB/s")
+        finally:
+            logger.set_logging(True)
+
+    def stop(self) -> None:
+        self.srvr.closing = True
+        self.srvr.stop_running()
+        while self.srvr.closing:
+            pass
+        self.srvr.server_thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+tls.py
+    Provides functions to create TLS contexts for encrypting the traffic of tcpsockets servers and clients.
+"""
+import ssl
+from pathlib import Path
+from typing import Union
+
+
+def create_server_context(certfile: Union[str, Path], keyfile: Union[str, Path] = None, password: str = None,
+                          minimum_version: ssl.TLSVersion = ssl.TLSVersion.TLSv1_3,
+                          session_tickets: int = 2) -> ssl.SSLContext:
+    """
+    Create a TLS context to be passed as ssl_context to tcpsockets.server servers.
+    Args:
+        certfile(Union[str, Path]): Path to the PEM certificate (chain) of the server.
+        keyfile(Union[str, Path]): Path to the PEM private key. Defaults to None if the key is inside certfile.
+        password(str): Password of the private key if it is encrypted.
+        minimum_version(ssl.TLSVersion): The lowest TLS version accepted. Defaults to TLS 1.3.
+        session_tickets(int): Number of TLS 1.3 session tickets sent to a client after a full handshake. Clients use
+                              them to resume the session on reconnect. Set to 0 to disable resumption.
+
+    Returns:
+        ssl.SSLContext: The server side context.
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = minimum_version
+    context.load_cert_chain(certfile, keyfile, password)
+    context.num_tickets = session_tickets
+    return context
+
+
+def create_client_context(cafile: Union[str, Path] = None, check_hostname: bool = True,
+                          minimum_version: ssl.TLSVersion = ssl.TLSVersion.TLSv1_3) -> ssl.SSLContext:
+    """
+    Create a TLS context to be passed as ssl_context to tcpsockets.client.ConnectedServer. Sessions can only be
+    resumed by connections made from the same context, so share one context between reconnecting clients.
+    Args:
+        cafile(Union[str, Path]): Path to the PEM certificates to trust, for example a self signed server certificate.
+                                  Defaults to None which uses the system's default certificates.
+        check_hostname(bool): Whether the server certificate must match the hostname connected to. Defaults to True.
+        minimum_version(ssl.TLSVersion): The lowest TLS version accepted. Defaults to TLS 1.3.
+
+    Returns:
+        ssl.SSLContext: The client side context.
+    """
+    context = ssl.create_default_context(cafile=cafile)
+    context.minimum_version = minimum_version
+    context.check_hostname = check_hostname
+    return context
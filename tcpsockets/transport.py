@@ -0,0 +1,271 @@
+"""
+transport.py
+    Provides the transports servers and clients can communicate over: TCP over IPV4, TCP over IPV6 (optionally dual
+    stack) and Unix domain sockets. The same framing is used over every transport.
+"""
+import os
+import socket
+import stat
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Tuple, Union
+
+coalesce_size: int = 64 * 1024
+
+
+class Transport(ABC):
+    """
+    An Abstract Transport describing how to create, bind and connect the stream sockets of a server.
+
+    Attributes:
+        family(int): The socket family (socket.AF_INET, socket.AF_INET6 or socket.AF_UNIX).
+        ip(str): The ip address of the server, or the socket path for Unix domain sockets.
+        port(Union[None, int]): The port of the server. None for Unix domain sockets.
+    """
+    family: int = socket.AF_INET
+
+    def __init__(self, ip: str, port: Union[None, int]):
+        self.ip: str = ip
+        self.port: Union[None, int] = port
+
+    @property
+    @abstractmethod
+    def address(self) -> Any:
+        """The address passed to socket.bind and socket.connect."""
+
+    def create_socket(self) -> socket.socket:
+        """
+        Create a new stream socket of this transport's family.
+        Returns:
+            socket.socket: The new socket.
+        """
+        return socket.socket(self.family, socket.SOCK_STREAM)
+
+    def bind(self, sckt: socket.socket) -> None:
+        """
+        Bind a socket created by create_socket to the transport's address.
+        Args:
+            sckt(socket.socket): The socket to be bound.
+
+        Returns:
+            None
+        """
+        sckt.bind(self.address)
+
+    def connect(self, sckt: socket.socket) -> None:
+        """
+        Connect a socket created by create_socket to the transport's address.
+        Args:
+            sckt(socket.socket): The socket to be connected.
+
+        Returns:
+            None
+        """
+        sckt.connect(self.address)
+
+    def peer(self, address: Any) -> Tuple[str, Union[None, int]]:
+        """
+        Convert the address returned by socket.accept to an (ip, port) tuple.
+        Args:
+            address(Any): The address returned by socket.accept.
+
+        Returns:
+            Tuple[str, Union[None, int]]: The ip and port of the peer.
+        """
+        return address[0], address[1]
+
+    def close(self) -> None:
+        """
+        Release anything the transport holds after the server socket is closed.
+        Returns:
+            None
+        """
+
+    def __str__(self) -> str:
+        return f"{self.ip} at {self.port}"
+
+
+@lru_cache(maxsize=None)
+def local_ip() -> str:
+    """
+    Look up the ip address(IPV4) of the local machine. The lookup can block on DNS, so it is only done the first time
+    it is needed and then cached.
+    Returns:
+        str: The ip address of the local machine.
+    """
+    return socket.gethostbyname(socket.gethostname())
+
+
+class TCPTransport(Transport):
+    """
+    TCP over IPV4.
+    Args:
+        ip(str): The ip address(IPV4). Defaults to None which binds to the local machine's ip, see local_ip.
+        port(int): The port. Port 0 lets the OS pick a free port when binding.
+    """
+    family = socket.AF_INET
+
+    def __init__(self, ip: Union[None, str], port: int):
+        super(TCPTransport, self).__init__(ip, port)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.ip, self.port
+
+    def bind(self, sckt: socket.socket) -> None:
+        if self.ip is None:
+            self.ip = local_ip()
+        super(TCPTransport, self).bind(sckt)
+        self.port = sckt.getsockname()[1]
+
+
+class TCP6Transport(TCPTransport):
+    """
+    TCP over IPV6.
+    Args:
+        ip(str): The ip address(IPV6). Defaults to "::" (all interfaces).
+        port(int): The port. Port 0 lets the OS pick a free port when binding.
+        dual_stack(bool): Whether a server bound to "::" also accepts IPV4 clients (as IPV4 mapped addresses).
+                          Defaults to False.
+    """
+    family = socket.AF_INET6
+
+    def __init__(self, ip: str = "::", port: int = 0, dual_stack: bool = False):
+        super(TCP6Transport, self).__init__(ip, port)
+        self.dual_stack: bool = dual_stack
+
+    def bind(self, sckt: socket.socket) -> None:
+        sckt.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0 if self.dual_stack else 1)
+        super(TCP6Transport, self).bind(sckt)
+
+    def __str__(self) -> str:
+        return f"[{self.ip}] at {self.port}"
+
+
+class UnixTransport(Transport):
+    """
+    Unix domain sockets, for peers on the same host. Avoids the TCP/IP stack entirely.
+    Args:
+        path(str): The file system path of the socket, or its name if abstract is True.
+        abstract(bool): Whether the socket lives in the Linux abstract namespace instead of the file system. Abstract
+                        sockets do not leave files behind. Defaults to False.
+    """
+    family = getattr(socket, "AF_UNIX", None)
+
+    def __init__(self, path: str, abstract: bool = False):
+        if self.family is None:
+            raise Exception("Unix domain sockets are not supported on this platform.")
+        super(UnixTransport, self).__init__(path, None)
+        self.abstract: bool = abstract
+
+    @property
+    def address(self) -> str:
+        return "\0" + self.ip if self.abstract else self.ip
+
+    def _is_socket_file(self) -> bool:
+        try:
+            return stat.S_ISSOCK(os.lstat(self.ip).st_mode)
+        except FileNotFoundError:
+            return False
+
+    def bind(self, sckt: socket.socket) -> None:
+        """
+        Bind to the path, first removing a socket file left behind by a server that is no longer running. Raises
+        Exception if the path is taken by anything else or by a server that still accepts connections.
+        """
+        if not self.abstract and os.path.lexists(self.ip):
+            if not self._is_socket_file():
+                raise Exception(f"{self.ip} exists and is not a socket.")
+            probe = self.create_socket()
+            try:
+                probe.connect(self.ip)
+            except ConnectionRefusedError:
+                os.unlink(self.ip)
+            else:
+                raise Exception(f"A server is already listening on {self.ip}.")
+            finally:
+                probe.close()
+        super(UnixTransport, self).bind(sckt)
+
+    def peer(self, address: Any) -> Tuple[str, Union[None, int]]:
+        if isinstance(address, bytes):
+            address = address.decode("utf-8", "replace")
+        return address or self.ip, None
+
+    def close(self) -> None:
+        if not self.abstract and self._is_socket_file():
+            os.unlink(self.ip)
+
+    def __str__(self) -> str:
+        return f"unix:{'@' if self.abstract else ''}{self.ip}"
+
+
+def tcp_transport(ip: Union[None, str], port: int) -> TCPTransport:
+    """
+    Get the TCP transport for an ip address, IPV6 if the address contains a ":" else IPV4.
+    Args:
+        ip(Union[None, str]): The ip address. None stands for the local machine's ip.
+        port(int): The port.
+
+    Returns:
+        TCPTransport: The transport.
+    """
+    if ip is not None and ":" in ip:
+        return TCP6Transport(ip, port)
+    return TCPTransport(ip, port)
+
+
+def send_frame(sckt: socket.socket, header: bytes, payload: bytes) -> None:
+    """
+    Send a header followed by its payload. Payloads up to coalesce_size bytes are joined with the header into one
+    write so that the peer does not wait on a delayed acknowledgement, larger ones are sent as they are to avoid
+    copying them.
+    Args:
+        sckt(socket.socket): The connected socket.
+        header(bytes): The header.
+        payload(bytes): The payload.
+
+    Returns:
+        None
+    """
+    if len(payload) <= coalesce_size:
+        sckt.sendall(header + payload)
+    else:
+        sckt.sendall(header)
+        sckt.sendall(payload)
+
+
+def receive_into(sckt: socket.socket, view: memoryview, chunk_size: int) -> None:
+    """
+    Fill a writable buffer completely with bytes received from a stream socket, at most chunk_size bytes at a time.
+    Args:
+        sckt(socket.socket): The connected socket.
+        view(memoryview): The buffer to be filled.
+        chunk_size(int): The largest number of bytes to receive at once.
+
+    Returns:
+        None
+    """
+    size = len(view)
+    received = 0
+    while received < size:
+        received_now = sckt.recv_into(view[received:], min(chunk_size, size - received))
+        if not received_now:
+            raise ConnectionError(f"Connection closed with {size - received} bytes left to receive")
+        received += received_now
+
+
+def receive_exactly(sckt: socket.socket, size: int, chunk_size: int) -> bytearray:
+    """
+    Receive exactly size bytes from a stream socket, at most chunk_size bytes at a time.
+    Args:
+        sckt(socket.socket): The connected socket.
+        size(int): The number of bytes to receive.
+        chunk_size(int): The largest number of bytes to receive at once.
+
+    Returns:
+        bytearray: The received bytes.
+    """
+    buffer = bytearray(size)
+    receive_into(sckt, memoryview(buffer), chunk_size)
+    return buffer